@@ -1,10 +1,15 @@
 from flask import Flask, render_template, Response, request, jsonify, session, redirect
 import time
 import threading
+import _thread
 import concurrent.futures
 from reco.model import DrivingSystem
+from reco.frame_bus import FrameBus
+from reco.scheduler import RecognizerScheduler
+from reco.process_pool import RecognizerProcessPool
 import keyboard
 import cv2
+import numpy as np
 import json
 import traceback
 import requests
@@ -18,8 +23,10 @@ import wave
 from pydub import AudioSegment
 import tempfile
 import os
-import whisper
-from opencc import OpenCC
+from reco.whis.model_registry import registry as whisper_registry
+from reco.whis.audio_io import decode_audio_bytes, AudioArchiver
+from reco.whis.batch_server import BatchTranscriptionService
+from reco.whis.vad import SpectralVAD
 from logs.log import log_bp, insert_log
 from reco.voice.voice import parse_voice_command, vehicle_status
 
@@ -34,12 +41,30 @@ output_condition = threading.Condition()
 # system = DrivingSystem(output_queue, output_condition)
 system = None
 
-# 共享帧和锁
-latest_frame = None
-frame_lock = threading.Lock()
+# Web 语音：内存解码（不产生临时文件），WAV 归档为可选的后台步骤
+WEB_AUDIO_IN_MEMORY = True
+audio_archiver = AudioArchiver(enabled=True)
+# 并发语音请求合并为一个批次解码，避免多个线程各自抢占 CPU
+BATCH_TRANSCRIPTION = True
+transcription_service = BatchTranscriptionService(max_batch_size=8, batch_window=0.05)
+# 上传语音送入 Whisper 前先裁剪首尾静音（trim 无状态，可在请求线程间共用）
+upload_vad = SpectralVAD()
+
+# 共享帧总线：预分配帧缓冲，消费者拿只读视图，不再逐帧拷贝
+frame_bus = FrameBus(pool_size=4)
 stop_event = threading.Event()
 threads_started = threading.Event()
 
+# 识别器调度：各识别器的目标处理频率
+FACE_TARGET_HZ = 10
+GESTURE_TARGET_HZ = 15
+scheduler = RecognizerScheduler(frame_bus, stop_event)
+# 识别器运行方式："thread" 为进程内线程；"process" 为独立子进程（绕开 GIL）
+RECOGNIZER_MODE = "thread"
+process_pool = RecognizerProcessPool(stop_event)
+shutdown_lock = threading.Lock()
+shutdown_done = threading.Event()
+
 def capture_frame():
     try:
         cap = cv2.VideoCapture(0)
@@ -48,21 +73,41 @@ def capture_frame():
         cap.set(cv2.CAP_PROP_FPS, 15)
 
         print("摄像头启动成功，开始读取帧...")
+        shape = None
         while not stop_event.is_set():
-            ret, frame = cap.read()
+            if shape is None:
+                # 首帧用于确定分辨率，之后直接读入总线的预分配缓冲
+                ret, frame = cap.read()
+                if not ret:
+                    continue
+                shape = frame.shape
+                index, buf = frame_bus.acquire_write_buffer(shape, frame.dtype)
+                if index is None:
+                    break
+                np.copyto(buf, frame)
+                frame_bus.publish(index)
+                continue
+
+            index, buf = frame_bus.acquire_write_buffer(shape)
+            if index is None:
+                break
+            ret, frame = cap.read(buf)
             if not ret:
                 continue
-            with frame_lock:
-                global latest_frame
-                latest_frame = frame.copy()
+            if frame is not buf:
+                # 后端未能原地写入（如分辨率变化）时退回一次拷贝
+                if frame.shape != shape:
+                    shape = None
+                    continue
+                np.copyto(buf, frame)
+            frame_bus.publish(index)
 
             # cv2.imshow("Camera", frame)
             # if cv2.waitKey(1) & 0xFF == ord('q'):
             #     stop_event.set()
             #     break
 
-            time.sleep(0.01)
-
+        frame_bus.close()
         cap.release()
         cv2.destroyAllWindows()
         print("摄像头释放")
@@ -74,13 +119,13 @@ def capture_frame():
 def handle_face_recognition():
     print("启动面部识别")
     try:
-        while not stop_event.is_set():
-            with frame_lock:
-                if latest_frame is None:
-                    continue
-                frame_copy = latest_frame.copy()
-            system.face_recognizer.process_frame(frame_copy)
-            time.sleep(0.05)
+        if RECOGNIZER_MODE == "process":
+            # 多进程模式：帧经共享内存送入子进程，只有状态变化事件回到主进程
+            process = process_pool.worker("face", system.handle_status_change).process
+        else:
+            process = system.face_recognizer.process_frame
+        # 只在新帧发布时唤醒，按目标频率处理，落后时丢弃旧帧
+        scheduler.run("face", process, target_hz=FACE_TARGET_HZ)
     except Exception as e:
         print("[异常] handle_face_recognition:", e)
         traceback.print_exc()
@@ -89,13 +134,11 @@ def handle_face_recognition():
 def handle_gesture_recognition():
     print("启动手势识别")
     try:
-        while not stop_event.is_set():
-            with frame_lock:
-                if latest_frame is None:
-                    continue
-                frame_copy = latest_frame.copy()
-            system.gesture_recognizer.process(frame_copy)
-            time.sleep(0.05)
+        if RECOGNIZER_MODE == "process":
+            process = process_pool.worker("gesture", system.handle_ges_change).process
+        else:
+            process = system.gesture_recognizer.process
+        scheduler.run("gesture", process, target_hz=GESTURE_TARGET_HZ)
     except Exception as e:
         print("[异常] handle_gesture_recognition:", e)
         traceback.print_exc()
@@ -116,16 +159,35 @@ def handle_voice_recognition_on_demand():
         traceback.print_exc()
 
 
+def shutdown(interrupt_main=True):
+    """
+    统一退出流程：停止采集与识别线程、关闭识别子进程并释放共享内存、停止后台服务，
+    最后让主线程从 app.run 中退出（替代原来的 os._exit(0)）
+    """
+    with shutdown_lock:
+        if shutdown_done.is_set():
+            return
+        shutdown_done.set()
+        stop_event.set()
+        frame_bus.close()
+        process_pool.shutdown()
+        transcription_service.stop()
+        audio_archiver.shutdown()
+        if system is not None:
+            system.close()
+    if interrupt_main:
+        _thread.interrupt_main()
+
+
 def wait_for_q():
     try:
         print("按下 'q' 键退出程序...")
         keyboard.wait('q')  # 阻塞直到按下 'q'
         print("检测到退出指令，退出中...")
-        stop_event.set()
         # 修改：不需要停止自动运行的语音识别，因为现在是按需的
         # if system and hasattr(system, 'voice_recognizer'):
         #     system.voice_recognizer.stop()
-        os._exit(0)
+        shutdown()
     except Exception as e:
         print("[异常] wait_for_q:", e)
         traceback.print_exc()
@@ -247,7 +309,8 @@ def index():
         threads_started.set()  # 设置标志，避免重复启动
         try:
             # 修改：初始化系统但不自动启动语音识别
-            system = DrivingSystem(output_queue, output_condition, username=session['username'], role=session['role'])
+            system = DrivingSystem(output_queue, output_condition, username=session['username'], role=session['role'],
+                                   in_process_recognizers=RECOGNIZER_MODE == "thread")
             print("✅ DrivingSystem初始化完成，语音识别设置为按需模式")
         except Exception as e:
             print("[初始化 DrivingSystem 异常]", e)
@@ -281,24 +344,32 @@ def voice_recognition():
         audio_filename = f"web_record_{timestamp}.wav"
         audio_save_path = f"./reco/whis/test/{audio_filename}"
 
-        # 确保目录存在
-        os.makedirs(os.path.dirname(audio_save_path), exist_ok=True)
-
-        # 音频格式转换（保持与原版兼容的格式）
+        # 音频格式转换（保持与原版兼容的格式：16kHz, 单声道）
         try:
-            # 保存临时文件
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_file:
-                temp_file.write(audio_data)
-                temp_webm_path = temp_file.name
+            if WEB_AUDIO_IN_MEMORY:
+                # 零落盘模式：webm/opus 字节直接解码为 float32 数组，WAV 归档改为后台可选步骤
+                decoded = decode_audio_bytes(audio_data)
+                audio_archiver.archive_wav(decoded, audio_save_path)
+                audio_input = upload_vad.trim(decoded)
+                print(f"[Web语音识别] 内存解码完成，时长: {len(decoded) / 16000:.2f}s，裁剪后: {len(audio_input) / 16000:.2f}s")
+            else:
+                # 确保目录存在
+                os.makedirs(os.path.dirname(audio_save_path), exist_ok=True)
+
+                # 保存临时文件
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_file:
+                    temp_file.write(audio_data)
+                    temp_webm_path = temp_file.name
 
-            # 转换为与原版相同的格式（16kHz, 单声道）
-            audio_segment = AudioSegment.from_file(temp_webm_path)
-            audio_segment = audio_segment.set_frame_rate(16000).set_channels(1)
-            audio_segment.export(audio_save_path, format="wav")
+                # 转换为与原版相同的格式（16kHz, 单声道）
+                audio_segment = AudioSegment.from_file(temp_webm_path)
+                audio_segment = audio_segment.set_frame_rate(16000).set_channels(1)
+                audio_segment.export(audio_save_path, format="wav")
 
-            # 清理临时文件
-            os.unlink(temp_webm_path)
-            print(f"[Web语音识别] 音频已保存: {audio_save_path}")
+                # 清理临时文件
+                os.unlink(temp_webm_path)
+                audio_input = audio_save_path
+                print(f"[Web语音识别] 音频已保存: {audio_save_path}")
 
         except Exception as e:
             print(f"[Web语音识别] 音频转换失败: {e}")
@@ -308,18 +379,14 @@ def voice_recognition():
         try:
             print("正在转录语音...")
 
-            # 直接使用原版的模型和参数
-            model_path = "./reco/whis/tiny.pt"
-            if os.path.exists(model_path):
-                model = whisper.load_model(model_path)
-                print(f"[Web语音识别] 加载原版tiny.pt模型: {model_path}")
-            else:
-                model = whisper.load_model("tiny")
-                print(f"[Web语音识别] 使用官方tiny模型")
-            cc = OpenCC("t2s")
+            # 模型由注册表常驻内存，首次调用才加载，之后直接复用
+            cc = whisper_registry.get_converter()
 
             # 🔧 使用与原版完全相同的转录参数
-            result = model.transcribe(audio_save_path, language="zh")
+            if BATCH_TRANSCRIPTION:
+                result = transcription_service.transcribe(audio_input)
+            else:
+                result = whisper_registry.transcribe(audio_input, "./reco/whis/tiny.pt", language="zh")
             text = cc.convert(result["text"])
 
             print(f"[Web语音识别] 语音内容: {text}")
@@ -327,8 +394,7 @@ def voice_recognition():
             if text and text.strip():
                 # 🔧 使用原版的文本保存方式
                 txt_path = os.path.join("./reco/whis/test", f"web_转写_{timestamp}.txt")
-                with open(txt_path, "a", encoding="utf-8") as f:
-                    f.write(f"[Web语音] {text}\n")
+                audio_archiver.append_text(txt_path, f"[Web语音] {text}\n")
 
                 # 🔧 触发原版的回调处理（如果存在）
                 if system and hasattr(system, 'voice_recognizer') and system.voice_recognizer.on_transcription:
@@ -468,6 +534,26 @@ def test_attention_warning():
         print(f"[API异常] test_attention_warning: {e}")
         return jsonify({"status": "error", "message": str(e)})
 
+# 性能统计API
+@app.route('/api/perf_stats', methods=['GET'])
+def perf_stats():
+    """返回各模块的性能统计（模型加载/预热耗时等）"""
+    stats = {
+        "whisper": whisper_registry.stats(),
+        "transcription": transcription_service.stats(),
+        "recognizers": scheduler.stats()
+    }
+    # 手势事件计数（多进程模式下识别器运行在子进程中，这里没有数据）
+    if system is not None and RECOGNIZER_MODE == "thread":
+        stats["gesture_events"] = system.gesture_recognizer.debouncer.stats()
+    if system is not None:
+        stats["llm"] = system.dispatcher.stats()
+        stats["intent_resolver"] = system.intent_resolver.stats()
+        stats["llm_cache"] = system.response_cache.stats()
+        stats["fusion"] = system.fusion.stats()
+        stats["llm_breaker"] = system.breaker.stats()
+    return jsonify(stats)
+
 # 退出登录
 @app.route('/logout')
 def logout():
@@ -489,11 +575,14 @@ if __name__ == '__main__':
         print("   - 车载面板提供完整的车载体验")
         print("   - 语音识别已设置为按需模式，点击录音按钮后才开始识别")
         print("=" * 60)
-        
+
+        # 后台预热 Whisper 模型，避免首个语音请求承担加载耗时
+        threading.Thread(target=whisper_registry.warm_up, daemon=True).start()
+
         app.run(debug=True, threaded=True, host='0.0.0.0', port=5000, use_reloader=False)
     except KeyboardInterrupt:
         print("检测到 Ctrl+C，退出中...")
-        stop_event.set()
+        shutdown(interrupt_main=False)
         # 修改：不需要停止自动运行的语音识别
         # if system:
         #     system.voice_recognizer.stop()
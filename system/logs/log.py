@@ -114,6 +114,20 @@ def insert_log(username, role,type, action):
         print(f"[日志写入失败] {e}")
 
 
+# ✅ 批量插入日志（一次连接、一次提交），entries 为 [(type, action), ...]
+def insert_logs(username, role, entries):
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO log (username, role, type, action) VALUES (?, ?, ?, ?)",
+                           [(username, role, type, action) for type, action in entries])
+        conn.commit()
+        conn.close()
+        print(f"[日志写入] {len(entries)} 条")
+    except Exception as e:
+        print(f"[日志写入失败] {e}")
+
+
 # 获取日志数据
 @log_bp.route('/get_logs', methods=['GET'])
 def get_logs():
@@ -0,0 +1,77 @@
+"""
+大模型请求格式对比（在 system 目录下运行）：
+    python -m reco.bench_llm [请求次数=50] [接口地址]
+不指定接口地址时启动本地桩服务（reco/llm_stub.py）
+分别以原始提示（长系统提示 + 自由格式回复）和紧凑结构化模式发送相同输入，
+输出每次调用的发送/接收字节数（HTTP 正文）、端到端延迟和回复解析耗时
+"""
+import json
+import os
+import sys
+import time
+import httpx
+import numpy as np
+from openai import OpenAI
+from reco.llm_stub import start_stub_server
+from reco.llm_prompt import build_llm_request
+
+SAMPLES = [
+    ("[语音指令] [语音] 加速到 60", "语音识别"),
+    ("[语音指令] [语音] 前方路口左转", "语音识别"),
+    ("[语音指令] [语音] 打开空调", "语音识别"),
+    ("[面部指令] [面部] 低头看手机", "面部识别"),
+    ("[手势输入] [手势] 握拳", "手势识别"),
+]
+
+
+def parse_legacy(content):
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    return json.loads(content)
+
+
+def run_mode(base_url, api_key, compact, count):
+    traffic = {"sent": 0, "received": 0}
+
+    def on_request(request):
+        traffic["sent"] += len(request.content)
+
+    def on_response(response):
+        response.read()
+        traffic["received"] += len(response.content)
+
+    http_client = httpx.Client(event_hooks={"request": [on_request], "response": [on_response]})
+    client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+    parse = json.loads if compact else parse_legacy
+    latencies, parse_times = [], []
+    for i in range(count):
+        text, mode = SAMPLES[i % len(SAMPLES)]
+        start = time.perf_counter()
+        completion = client.chat.completions.create(**build_llm_request(text, mode, compact))
+        latencies.append(time.perf_counter() - start)
+        content = completion.choices[0].message.content
+        start = time.perf_counter()
+        parse(content)
+        parse_times.append(time.perf_counter() - start)
+    http_client.close()
+    return traffic, latencies, parse_times
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    if len(sys.argv) > 2:
+        base_url, api_key = sys.argv[2], os.getenv("DASHSCOPE_API_KEY", "")
+    else:
+        server, base_url = start_stub_server()
+        api_key = "stub"
+    print(f"接口: {base_url}，每种模式 {count} 次调用")
+
+    for name, compact in (("原始提示", False), ("紧凑结构化", True)):
+        traffic, latencies, parse_times = run_mode(base_url, api_key, compact, count)
+        print(f"{name}: 发送 {traffic['sent'] / count:.0f} B/次，接收 {traffic['received'] / count:.0f} B/次，"
+              f"延迟 平均 {np.mean(latencies) * 1000:.1f} ms / p95 {np.percentile(latencies, 95) * 1000:.1f} ms，"
+              f"解析 {np.mean(parse_times) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于打开状态，请求未发送"""
+
+
+class CircuitBreaker:
+    """
+    接口调用熔断器
+    - closed：正常放行；最近 window 次调用中失败或慢调用（耗时超过 slow_call_threshold）
+      的比例达到 failure_ratio（且至少 min_calls 次）时打开
+    - open：直接抛出 CircuitOpenError，由调用方走本地兜底；reset_timeout 秒后进入 half_open
+    - half_open：只放行 probe_calls 个探测请求，成功（且不慢）则关闭，失败或慢调用则重新打开
+    状态变化记录在 transitions 中，并可通过 on_transition(旧状态, 新状态, 原因) 通知
+    """
+
+    def __init__(self, name="llm", window=10, min_calls=3, failure_ratio=0.5,
+                 slow_call_threshold=3.0, reset_timeout=15.0, probe_calls=1, on_transition=None):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_calls = probe_calls
+        self.on_transition = on_transition
+        self._outcomes = deque(maxlen=window)  # True 表示失败或慢调用
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.transitions = deque(maxlen=50)
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._check_reset()
+            return self._state
+
+    def _transition(self, new_state, reason):
+        old_state = self._state
+        self._state = new_state
+        self.transitions.append({"time": time.time(), "from": old_state, "to": new_state, "reason": reason})
+        print(f"[熔断器:{self.name}] {old_state} -> {new_state}（{reason}）")
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+        if new_state != HALF_OPEN:
+            self._probes = 0
+        if new_state == CLOSED:
+            self._outcomes.clear()
+        if self.on_transition is not None:
+            try:
+                self.on_transition(old_state, new_state, reason)
+            except Exception as e:
+                print(f"[熔断器:{self.name}] 状态回调异常: {e}")
+
+    def _check_reset(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN, f"打开已超过 {self.reset_timeout}s，开始探测")
+
+    def _acquire(self):
+        with self._lock:
+            self._check_reset()
+            if self._state == OPEN or (self._state == HALF_OPEN and self._probes >= self.probe_calls):
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} 熔断中")
+            if self._state == HALF_OPEN:
+                self._probes += 1
+            self.calls += 1
+            return self._state
+
+    def _record(self, state_at_start, failed, reason):
+        with self._lock:
+            if state_at_start == HALF_OPEN and self._state == HALF_OPEN:
+                if failed:
+                    self._transition(OPEN, f"探测失败: {reason}")
+                else:
+                    self._transition(CLOSED, "探测成功")
+                return
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(failed)
+            bad = sum(self._outcomes)
+            if len(self._outcomes) >= self.min_calls and bad / len(self._outcomes) >= self.failure_ratio:
+                self._transition(OPEN, f"最近 {len(self._outcomes)} 次中 {bad} 次失败或超慢（{reason}）")
+
+    def call(self, func, *args, **kwargs):
+        """经熔断器调用 func；打开时抛出 CircuitOpenError，func 的异常原样抛出"""
+        state_at_start = self._acquire()
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            self._record(state_at_start, True, f"{type(e).__name__}: {e}")
+            raise
+        elapsed = time.perf_counter() - started
+        slow = elapsed > self.slow_call_threshold
+        if slow:
+            with self._lock:
+                self.slow_calls += 1
+        self._record(state_at_start, slow, f"耗时 {elapsed:.2f}s")
+        return result
+
+    def stats(self):
+        with self._lock:
+            self._check_reset()
+            return {
+                "state": self._state,
+                "calls": self.calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "rejected": self.rejected,
+                "transitions": list(self.transitions)
+            }
@@ -0,0 +1,90 @@
+import queue
+import threading
+import time
+
+
+class EventFusion:
+    """
+    多模态事件融合
+    - 识别器回调只把 (输入文本, 日志类型) 放入队列并立即返回
+    - 单个工作线程以第一个事件为起点，在 window 秒内收集所有模态的事件，
+      同一时间窗内完全相同的事件只保留一次，然后整批交给 flush(events)
+    - 紧急事件（is_urgent 为真，如注意力偏离）不等待时间窗，连同已收集的事件立即处理
+    """
+
+    def __init__(self, flush, window=0.15, max_events=16, is_urgent=None):
+        self.flush = flush
+        self.window = window
+        self.max_events = max_events
+        self.is_urgent = is_urgent or (lambda text: False)
+        self.event_queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.total_events = 0
+        self.deduplicated = 0
+        self.total_batches = 0
+        self.max_seen_batch_size = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="event-fusion", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self.event_queue.put(None)
+
+    def add(self, text, log_type):
+        self.start()
+        self.event_queue.put((text, log_type))
+
+    def _collect_batch(self, first):
+        batch = [first]
+        if self.is_urgent(first[0]):
+            return batch
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_events:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                event = self.event_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is None:
+                # 停止信号放回队列，处理完当前批次后退出
+                self.event_queue.put(None)
+                break
+            batch.append(event)
+            if self.is_urgent(event[0]):
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            first = self.event_queue.get()
+            if first is None:
+                break
+            batch = self._collect_batch(first)
+            events = list(dict.fromkeys(batch))
+            with self._stats_lock:
+                self.total_events += len(batch)
+                self.deduplicated += len(batch) - len(events)
+                self.total_batches += 1
+                self.max_seen_batch_size = max(self.max_seen_batch_size, len(events))
+            try:
+                self.flush(events)
+            except Exception as e:
+                print(f"[事件融合] 处理异常: {e}")
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self.event_queue.qsize(),
+                "events": self.total_events,
+                "deduplicated": self.deduplicated,
+                "batches": self.total_batches,
+                "max_batch_size": self.max_seen_batch_size
+            }
@@ -0,0 +1,111 @@
+"""
+面部识别性能对比（在 system 目录下运行）：
+    python -m reco.face.bench_face 录制片段.mp4 [最大帧数]
+以改动前的逐帧流程（全图检测、无初值 solvePnP、decomposeProjectionMatrix 求角度）为基准，
+输出各模式的平均耗时，以及最大人脸的 pitch/yaw 与基准的误差
+"""
+import sys
+import time
+import cv2
+import dlib
+import numpy as np
+from reco.face.face import FaceRecognizer, TRACK_POSE_TOLERANCE_DEG
+from reco.face.pose import MODEL_POINTS, POSE_LANDMARKS, fold_angle, landmarks_to_array
+
+
+class OriginalPipeline:
+    """改动前 FaceRecognizer.process_frame 的检测与姿态计算，人脸按面积从大到小返回"""
+
+    def __init__(self, model_path="shape_predictor_68_face_landmarks.dat"):
+        self.detector = dlib.get_frontal_face_detector()
+        self.predictor = dlib.shape_predictor(model_path)
+        self.detect_count = 0
+
+    def estimate_poses(self, gray, size):
+        self.detect_count += 1
+        focal_length = size[1]
+        cam_matrix = np.array([[focal_length, 0, size[1] / 2],
+                               [0, focal_length, size[0] / 2],
+                               [0, 0, 1]], dtype="double")
+        poses = []
+        for face in self.detector(gray):
+            shape = self.predictor(gray, face)
+            image_points = landmarks_to_array(shape, POSE_LANDMARKS)
+            _, rvec, tvec = cv2.solvePnP(MODEL_POINTS, image_points, cam_matrix, np.zeros((4, 1)))
+            rmat, _ = cv2.Rodrigues(rvec)
+            angles = cv2.decomposeProjectionMatrix(np.hstack((rmat, tvec)))[6]
+            pitch, yaw, roll = (fold_angle(angle[0]) for angle in angles)
+            poses.append((face, pitch, yaw, roll))
+        poses.sort(key=lambda pose: pose[0].area(), reverse=True)
+        return poses
+
+
+def load_clip(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_mode(recognizer, frames):
+    """逐帧估计第一张人脸的姿态，返回 (每帧耗时列表, 每帧 (pitch, yaw) 或 None)"""
+    durations, poses = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        result = recognizer.estimate_poses(gray, frame.shape)
+        durations.append(time.perf_counter() - start)
+        poses.append((result[0][1], result[0][2]) if result else None)
+    return durations, poses
+
+
+def compare(reference, poses):
+    errors = [(abs(p[0] - r[0]), abs(p[1] - r[1])) for r, p in zip(reference, poses) if r and p]
+    if not errors:
+        return None
+    errors = np.array(errors)
+    return errors.mean(axis=0), errors.max(axis=0), len(errors)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    frames = load_clip(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 300)
+    print(f"读取 {len(frames)} 帧")
+
+    modes = {
+        "原始流程(基准)": OriginalPipeline(),
+        "全图检测": FaceRecognizer(),
+        "缩小检测(0.5倍)": FaceRecognizer(detect_scale=0.5),
+        "跟踪模式(每5帧检测)": FaceRecognizer(tracking=True, detect_interval=5),
+    }
+    reference = None
+    for name, recognizer in modes.items():
+        durations, poses = run_mode(recognizer, frames)
+        line = (f"{name}: 平均 {np.mean(durations) * 1000:.1f} ms/帧（p95 {np.percentile(durations, 95) * 1000:.1f} ms）"
+                f"，全图检测 {recognizer.detect_count} 次")
+        if reference is None:
+            reference = poses
+        else:
+            result = compare(reference, poses)
+            if result:
+                mean_err, max_err, count = result
+                line += (f"，pitch 误差 均值 {mean_err[0]:.2f}° / 最大 {max_err[0]:.2f}°"
+                         f"，yaw 误差 均值 {mean_err[1]:.2f}° / 最大 {max_err[1]:.2f}°（{count} 帧）")
+                if max(mean_err) > TRACK_POSE_TOLERANCE_DEG:
+                    line += f"  ⚠ 超出容限 {TRACK_POSE_TOLERANCE_DEG}°"
+            # 缩小检测会漏掉接近 HOG 最小尺寸的人脸，漏检帧不计入误差，单独报告
+            missed = sum(1 for r, p in zip(reference, poses) if r and not p)
+            if missed:
+                line += f"，基准检出而本模式未检出 {missed} 帧"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
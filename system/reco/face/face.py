@@ -3,42 +3,92 @@ import dlib
 import numpy as np
 from PIL import ImageFont, ImageDraw, Image
 import time
-from collections import deque
 import threading
+from reco.face.rolling import RollingStats
+from reco.face.pose import HeadPoseEngine, MODEL_POINTS, POSE_LANDMARKS, landmarks_to_array, rotation_to_euler
+
+# 跟踪模式下的姿态误差容限：跟踪框上预测的关键点得到的 pitch/yaw
+# 与改动前逐帧全图检测流程的平均偏差不超过该角度（reco/face/bench_face.py 按此容限标出超限的模式）
+TRACK_POSE_TOLERANCE_DEG = 3.0
+
+# 检测框与已有轨迹匹配所需的最小 IoU
+TRACK_MATCH_IOU = 0.3
+
+
+def box_iou(a, b):
+    """两个 dlib.rectangle 的交并比"""
+    inter = a.intersect(b)
+    inter_area = inter.area() if inter.right() >= inter.left() and inter.bottom() >= inter.top() else 0
+    union = a.area() + b.area() - inter_area
+    return inter_area / union if union > 0 else 0.0
+
+
+class FaceTrack:
+    """单个乘员的人脸轨迹：稳定 ID、当前人脸框、跟踪器、姿态历史以及独立的状态机"""
+
+    def __init__(self, track_id, box, now):
+        self.id = track_id
+        self.box = box
+        self.tracker = None
+        self.pose_guess = None
+        self.missed = 0
+        self.seen = True
+
+        # 保存头部姿态历史数据（用于检测动态/静态动作），滑动窗口统计均为 O(1)
+        self.pitch_history = RollingStats(10)
+        self.yaw_history = RollingStats(10)
+
+        # 注视前方时间记录 & 注意力警告标志
+        self.last_forward_time = now
+        self.attention_warning = False
+        self.yaw=0
+        self.head=0
+        self.state=0   # 0:注视前方 1:点头确认 2:摇头拒绝 3:低头看手机 4:向右说话 5:向左说话 6：注意力偏离
+        self.statue = "未检测"
+
 
 class FaceRecognizer:
-    def __init__(self, font_path="simhei.ttf", model_path="shape_predictor_68_face_landmarks.dat", on_status_change=None):
+    def __init__(self, font_path="simhei.ttf", model_path="shape_predictor_68_face_landmarks.dat", on_status_change=None,
+                 tracking=False, detect_interval=5, min_track_quality=7.0, detect_scale=1.0,
+                 max_faces=3, driver_policy="largest", max_missed=3):
         # 人脸检测器与关键点预测器
         self.detector = dlib.get_frontal_face_detector()
         self.predictor = dlib.shape_predictor(model_path)
         self.font_path = font_path
 
-        # 注视前方时间记录 & 注意力警告标志
-        self.pitch_history = deque(maxlen=10)
-        self.yaw_history = deque(maxlen=10)
-        self.last_forward_time = time.time()
-        self.attention_warning = False
+        # 跟踪模式：每 detect_interval 帧（或跟踪置信度低于 min_track_quality 时）才做一次全图 HOG 检测，
+        # 其余帧用相关滤波跟踪器更新人脸框，关键点只在跟踪框内预测
+        self.tracking = tracking
+        self.detect_interval = detect_interval
+        self.min_track_quality = min_track_quality
+        self.frames_since_detect = 0
+        self.detect_count = 0
+        self.track_count = 0
+
+        # 多尺度检测：HOG 在缩小 detect_scale 倍的灰度图上运行，人脸框再映射回原图坐标，
+        # 68 点关键点仍在原分辨率上预测。HOG 最小可检人脸约 80x80，
+        # 缩放 0.5 时原图中的人脸需大于约 160 像素；姿态误差同样按 TRACK_POSE_TOLERANCE_DEG 衡量，
+        # 接近该尺寸的人脸会出现漏检，bench_face 会单独报告基准检出而缩小检测漏掉的帧数
+        self.detect_scale = detect_scale
 
-        # 保存头部姿态历史数据（用于检测动态动作）
-        self.pitch_history = deque(maxlen=10)
-        self.yaw_history = deque(maxlen=10)
+        # 多乘员：每张人脸一条轨迹（稳定 ID、独立的姿态历史与状态机），最多同时跟踪 max_faces 张，
+        # 只有驾驶员轨迹的状态变化会触发回调。driver_policy: largest（人脸最大）/ leftmost / rightmost
+        self.max_faces = max_faces
+        self.driver_policy = driver_policy
+        self.max_missed = max_missed
+        self.tracks = []
+        self.driver_id = None
+        self._next_track_id = 1
+        self.attention_warning = False
 
         # 3D 参考人脸特征点（鼻尖、下巴、眼角、嘴角）
-        self.model_points = np.array([
-            (0.0, 0.0, 0.0),
-            (0.0, -330.0, -65.0),
-            (-225.0, 170.0, -135.0),
-            (225.0, 170.0, -135.0),
-            (-150.0, -150.0, -125.0),
-            (150.0, -150.0, -125.0)
-        ])
+        self.model_points = MODEL_POINTS
+        # 姿态引擎：缓存相机内参，并用同一轨迹上一帧的姿态作为 solvePnP 初值
+        self.pose_engine = HeadPoseEngine(self.model_points)
 
         self.statue = "未检测"  # 新增：存储当前状态
         self.on_status_change = on_status_change
         self.statue_lock = threading.Lock()  # 线程锁保护状态读写
-        self.yaw=0
-        self.head=0
-        self.state=0   # 0:注视前方 1:点头确认 2:摇头拒绝 3:低头看手机 4:向右说话 5:向左说话 6：注意力偏离
         # self.running = False
 
     def draw_chinese_text(self, frame, text, position, color=(255, 0, 0), font_size=30):
@@ -50,89 +100,205 @@ class FaceRecognizer:
         return cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
 
     def get_camera_matrix(self, size):
-        # 构造摄像头内参矩阵
-        focal_length = size[1]
-        center = (size[1] / 2, size[0] / 2)
-        return np.array([[focal_length, 0, center[0]],
-                         [0, focal_length, center[1]],
-                         [0, 0, 1]], dtype="double")
+        # 构造摄像头内参矩阵（按帧尺寸缓存）
+        return self.pose_engine.intrinsics(size)[0]
 
     def get_head_pose(self, shape, size):
         # 从关键点计算姿态估计
-        image_points = np.array([
-            (shape.part(30).x, shape.part(30).y),  # 鼻尖
-            (shape.part(8).x, shape.part(8).y),    # 下巴
-            (shape.part(36).x, shape.part(36).y),  # 左眼角
-            (shape.part(45).x, shape.part(45).y),  # 右眼角
-            (shape.part(48).x, shape.part(48).y),  # 左嘴角
-            (shape.part(54).x, shape.part(54).y)   # 右嘴角
-        ], dtype="double")
-
-        cam_matrix = self.get_camera_matrix(size)
-        dist_coeffs = np.zeros((4, 1))  # 默认无畸变
-        success, rvec, tvec = cv2.solvePnP(self.model_points, image_points, cam_matrix, dist_coeffs)
-        return rvec, tvec, cam_matrix
+        image_points = landmarks_to_array(shape, POSE_LANDMARKS)
+        return self.pose_engine.solve(image_points, size)
 
     def get_euler_angles(self, rvec, tvec, cam_matrix):
-        """将姿态估计的旋转向量转为欧拉角（pitch, yaw, roll）"""
+        """将姿态估计的旋转向量转为欧拉角（pitch, yaw, roll），由旋转矩阵闭式求解"""
         rmat, _ = cv2.Rodrigues(rvec)    # 旋转向量 -> 旋转矩阵
-        proj = np.hstack((rmat, tvec))   # 构建投影矩阵：3x4
-        _, _, _, _, _, _, angles = cv2.decomposeProjectionMatrix(proj)
-        pitch, yaw, roll = angles[0][0], angles[1][0], angles[2][0]
-
-        # 修正角度范围：将 pitch, yaw 保持在 [-90, 90]，roll 在 [-90, 90]
-        if pitch < -90: pitch += 180
-        elif pitch > 90: pitch -= 180
-        if yaw < -90: yaw += 180
-        elif yaw > 90: yaw -= 180
-        if roll > 90: roll -= 180
-        elif roll < -90: roll += 180
-
-        return pitch, yaw, roll
+        return rotation_to_euler(rmat)
 
-    def detect_dynamic_motion(self):
+    def detect_dynamic_motion(self, track):
         # 动作检测（点头、摇头）
-        if len(self.pitch_history) < 5:
+        if len(track.pitch_history) < 5:
             return None
-        pitch_range = max(self.pitch_history) - min(self.pitch_history)
-        yaw_range = max(self.yaw_history) - min(self.yaw_history)
-        if pitch_range > 10 and self.state!=1:
-            self.head+=1
-            if self.head>2 and self.state!=1:
-              self.head=0
-              self.state=1
+        pitch_range = track.pitch_history.range()
+        yaw_range = track.yaw_history.range()
+        if pitch_range > 10 and track.state!=1:
+            track.head+=1
+            if track.head>2 and track.state!=1:
+              track.head=0
+              track.state=1
               return "点头确认"
         elif yaw_range > 40:
-            self.yaw+=1
-            if self.yaw>3 and self.state!=2:
-              self.yaw=0
-              self.state=2
+            track.yaw+=1
+            if track.yaw>3 and track.state!=2:
+              track.yaw=0
+              track.state=2
               return "摇头拒绝"
         return None
 
-    def detect_static_pose(self):
+    def detect_static_pose(self, track):
         # 姿态检测（低头、静止转头）
-        if len(self.pitch_history) < 5:
+        if len(track.pitch_history) < 5:
             return None
-        pitch_mean = np.mean(self.pitch_history)
-        pitch_std = np.std(self.pitch_history)
-        yaw_mean = np.mean(self.yaw_history)
-        yaw_std = np.std(self.yaw_history)
-
-        if pitch_mean > 5 and pitch_std < 5 and self.state!=3:
-            self.state=3
-            self.head=0
+        pitch_mean = track.pitch_history.mean()
+        pitch_std = track.pitch_history.std()
+        yaw_mean = track.yaw_history.mean()
+        yaw_std = track.yaw_history.std()
+
+        if pitch_mean > 5 and pitch_std < 5 and track.state!=3:
+            track.state=3
+            track.head=0
             return "低头看手机"
-        elif yaw_mean > 20 and yaw_std < 5 and self.state!=4:
-            self.yaw=0
-            self.state=4
+        elif yaw_mean > 20 and yaw_std < 5 and track.state!=4:
+            track.yaw=0
+            track.state=4
             return "向右说话"
-        elif yaw_mean < -20 and yaw_std < 5 and self.state!=5:
-            self.yaw=0
-            self.state=5
+        elif yaw_mean < -20 and yaw_std < 5 and track.state!=5:
+            track.yaw=0
+            track.state=5
             return "向左说话"
         return None
 
+    def detect_faces(self, gray):
+        """全图 HOG 人脸检测（可在缩小后的图像上检测）"""
+        self.detect_count += 1
+        scale = self.detect_scale
+        if scale >= 1.0:
+            return list(self.detector(gray))
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return [
+            dlib.rectangle(int(rect.left() / scale), int(rect.top() / scale),
+                           int(rect.right() / scale), int(rect.bottom() / scale))
+            for rect in self.detector(small)
+        ]
+
+    def _match_tracks(self, gray, faces, now):
+        """把检测框按 IoU 贪心匹配到已有轨迹；未匹配的检测框新建轨迹，未匹配的轨迹累计丢失次数"""
+        # 人数上限：只保留面积最大的 max_faces 个检测框
+        faces = sorted(faces, key=lambda f: f.area(), reverse=True)[:self.max_faces]
+        pairs = sorted(
+            ((box_iou(track.box, face), ti, fi) for ti, track in enumerate(self.tracks) for fi, face in enumerate(faces)),
+            reverse=True
+        )
+        matched_tracks, matched_faces = set(), set()
+        for iou, ti, fi in pairs:
+            if iou < TRACK_MATCH_IOU:
+                break
+            if ti in matched_tracks or fi in matched_faces:
+                continue
+            matched_tracks.add(ti)
+            matched_faces.add(fi)
+            self.tracks[ti].box = faces[fi]
+
+        for ti, track in enumerate(self.tracks):
+            track.seen = ti in matched_tracks
+            track.missed = 0 if track.seen else track.missed + 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        for fi, face in enumerate(faces):
+            if fi not in matched_faces and len(self.tracks) < self.max_faces:
+                self.tracks.append(FaceTrack(self._next_track_id, face, now))
+                self._next_track_id += 1
+
+        if self.tracking:
+            for track in self.tracks:
+                if track.seen:
+                    track.tracker = dlib.correlation_tracker()
+                    track.tracker.start_track(gray, track.box)
+                else:
+                    track.tracker = None
+
+    def locate_faces(self, gray, now=None):
+        """
+        更新所有人脸轨迹并返回本帧可见的轨迹
+        非跟踪模式下每帧全图检测；跟踪模式下优先用各轨迹的跟踪器更新，到期或任一置信度不足时重新检测
+        """
+        now = time.time() if now is None else now
+        if self.tracking and self.frames_since_detect < self.detect_interval:
+            active = [track for track in self.tracks if track.tracker is not None]
+            if active:
+                boxes = []
+                for track in active:
+                    quality = track.tracker.update(gray)
+                    if quality < self.min_track_quality:
+                        boxes = None
+                        break
+                    pos = track.tracker.get_position()
+                    boxes.append(dlib.rectangle(int(pos.left()), int(pos.top()), int(pos.right()), int(pos.bottom())))
+                if boxes is not None:
+                    for track, box in zip(active, boxes):
+                        track.box = box
+                    self.frames_since_detect += 1
+                    self.track_count += 1
+                    return active
+
+        self._match_tracks(gray, self.detect_faces(gray), now)
+        self.frames_since_detect = 0
+        return [track for track in self.tracks if track.seen]
+
+    def select_driver(self, visible):
+        """
+        按策略选择驾驶员轨迹；已选中的驾驶员只要轨迹未过期就保持不变
+        （短暂漏检的帧返回 None，不会把驾驶员切换成乘客）
+        """
+        for track in visible:
+            if track.id == self.driver_id:
+                return track
+        if not visible or any(track.id == self.driver_id for track in self.tracks):
+            return None
+        if self.driver_policy == "leftmost":
+            driver = min(visible, key=lambda t: t.box.left())
+        elif self.driver_policy == "rightmost":
+            driver = max(visible, key=lambda t: t.box.right())
+        else:
+            driver = max(visible, key=lambda t: t.box.area())
+        self.driver_id = driver.id
+        return driver
+
+    def _track_poses(self, gray, size, now=None):
+        """对每条可见轨迹预测关键点并估计头部姿态，返回 [(track, pitch, yaw, roll)]"""
+        poses = []
+        for track in self.locate_faces(gray, now):
+            shape = self.predictor(gray, track.box)
+            pitch, yaw, roll, rvec, tvec = self.pose_engine.estimate(shape, size, track.pose_guess)
+            track.pose_guess = (rvec, tvec)
+            poses.append((track, pitch, yaw, roll))
+        return poses
+
+    def estimate_poses(self, gray, size):
+        """返回 [(face, pitch, yaw, roll)]，驾驶员排在第一位；只更新轨迹，不触发状态机"""
+        poses = self._track_poses(gray, size)
+        driver = self.select_driver([track for track, *_ in poses])
+        poses.sort(key=lambda p: p[0] is not driver)
+        return [(track.box, pitch, yaw, roll) for track, pitch, yaw, roll in poses]
+
+    def update_track_state(self, track, pitch, yaw, now):
+        """单条轨迹的状态机，返回该乘员当前状态"""
+        # 更新历史数据
+        track.pitch_history.append(pitch)
+        track.yaw_history.append(yaw)
+
+        # 注视状态判断
+        if abs(yaw) < 20 and abs(pitch) < 15:
+            track.last_forward_time = now
+
+        # 动态/静态行为检测
+        motion = self.detect_dynamic_motion(track)
+        pose = self.detect_static_pose(track)
+
+        state = "注视前方"
+        track.attention_warning = False
+
+        if motion:
+            state = motion
+        elif pose:
+            state = pose
+        elif now - track.last_forward_time > 3 and track.state!=6:
+            track.attention_warning = True
+            track.yaw=0
+            track.state=6
+            state = "注意力偏离超过3秒"
+
+        track.statue = state
+        return state
+
     # 线程安全状态写入
     def set_statue(self, new_status):
         with self.statue_lock:
@@ -157,44 +323,22 @@ class FaceRecognizer:
         #     return None
 
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.detector(gray)
         now = time.time()
         state = "未检测到人脸"
         pitch = None
         yaw = None
 
-        for face in faces:
-            shape = self.predictor(gray, face)
-            rvec, tvec, cam_mtx = self.get_head_pose(shape, frame.shape)
-            pitch = None
-            yaw = None
-            pitch, yaw, _ = self.get_euler_angles(rvec, tvec, cam_mtx)
-
-            # 更新历史数据
-            self.pitch_history.append(pitch)
-            self.yaw_history.append(yaw)
-
-            # 注视状态判断
-            if abs(yaw) < 20 and abs(pitch) < 15:
-                self.last_forward_time = now
-
-            # 动态/静态行为检测
-            motion = self.detect_dynamic_motion()
-            pose = self.detect_static_pose()
-
-            state = "注视前方"
-            self.attention_warning = False
-
-            if motion:
-                state = motion
-            elif pose:
-                state = pose
-            elif now - self.last_forward_time > 3 and self.state!=6:
-                self.attention_warning = True
-                self.yaw=0
-                self.state=6
-                state = "注意力偏离超过3秒"
+        # 每个乘员独立更新状态机，开销随人数线性增长（人数有上限）
+        poses = self._track_poses(gray, frame.shape, now)
+        for track, track_pitch, track_yaw, _ in poses:
+            self.update_track_state(track, track_pitch, track_yaw, now)
 
+        # 只有驾驶员的状态会对外发布
+        driver = self.select_driver([track for track, *_ in poses])
+        if driver is not None:
+            state = driver.statue
+            pitch, yaw = next((p, y) for t, p, y, _ in poses if t is driver)
+            self.attention_warning = driver.attention_warning
             # 线程安全地更新状态
             self.set_statue(state)
 
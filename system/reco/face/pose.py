@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+
+# solvePnP 使用的 6 个关键点：鼻尖、下巴、左眼角、右眼角、左嘴角、右嘴角
+POSE_LANDMARKS = (30, 8, 36, 45, 48, 54)
+
+# 3D 参考人脸特征点（与 POSE_LANDMARKS 一一对应）
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),
+    (0.0, -330.0, -65.0),
+    (-225.0, 170.0, -135.0),
+    (225.0, 170.0, -135.0),
+    (-150.0, -150.0, -125.0),
+    (150.0, -150.0, -125.0)
+])
+
+
+def landmarks_to_array(shape, indices=None) -> np.ndarray:
+    """dlib 关键点转为 (n, 2) float64 数组；parts() 只调用一次"""
+    parts = shape.parts()
+    if indices is None:
+        indices = range(len(parts))
+    return np.array([(parts[i].x, parts[i].y) for i in indices], dtype=np.float64)
+
+
+def fold_angle(angle):
+    """把角度折叠到 [-90, 90]（与原 get_euler_angles 的修正规则一致）"""
+    if angle < -90:
+        angle += 180
+    elif angle > 90:
+        angle -= 180
+    return angle
+
+
+def rotation_to_euler(rmat):
+    """
+    旋转矩阵闭式求欧拉角（pitch, yaw, roll），单位为度
+    按 R = Rz·Ry·Rx 分解，与 decomposeProjectionMatrix(RQDecomp3x3) 对纯旋转矩阵的结果一致
+    """
+    pitch = np.degrees(np.arctan2(rmat[2, 1], rmat[2, 2]))
+    yaw = np.degrees(np.arctan2(-rmat[2, 0], np.hypot(rmat[2, 1], rmat[2, 2])))
+    roll = np.degrees(np.arctan2(rmat[1, 0], rmat[0, 0]))
+    return fold_angle(pitch), fold_angle(yaw), fold_angle(roll)
+
+
+class HeadPoseEngine:
+    """
+    头部姿态估计
+    - 相机内参与畸变系数按帧尺寸缓存，不再每帧重建
+    - 传入上一帧的 (rvec, tvec) 时作为 solvePnP 的外参初值，连续跟踪的人脸迭代次数更少
+    """
+
+    def __init__(self, model_points=MODEL_POINTS):
+        self.model_points = np.ascontiguousarray(model_points, dtype=np.float64)
+        self._intrinsics = {}
+
+    def intrinsics(self, size):
+        key = (size[0], size[1])
+        cached = self._intrinsics.get(key)
+        if cached is None:
+            focal_length = size[1]
+            center = (size[1] / 2, size[0] / 2)
+            cam_matrix = np.array([[focal_length, 0, center[0]],
+                                   [0, focal_length, center[1]],
+                                   [0, 0, 1]], dtype="double")
+            dist_coeffs = np.zeros((4, 1))  # 默认无畸变
+            cached = (cam_matrix, dist_coeffs)
+            self._intrinsics[key] = cached
+        return cached
+
+    def solve(self, image_points, size, guess=None):
+        """返回 (rvec, tvec, cam_matrix)；guess 为上一帧的 (rvec, tvec)"""
+        cam_matrix, dist_coeffs = self.intrinsics(size)
+        if guess is not None:
+            success, rvec, tvec = cv2.solvePnP(self.model_points, image_points, cam_matrix, dist_coeffs,
+                                               guess[0].copy(), guess[1].copy(), useExtrinsicGuess=True)
+        else:
+            success, rvec, tvec = cv2.solvePnP(self.model_points, image_points, cam_matrix, dist_coeffs)
+        return rvec, tvec, cam_matrix
+
+    def estimate(self, shape, size, guess=None):
+        """dlib 关键点 -> (pitch, yaw, roll, rvec, tvec)"""
+        image_points = landmarks_to_array(shape, POSE_LANDMARKS)
+        rvec, tvec, _ = self.solve(image_points, size, guess)
+        rmat, _ = cv2.Rodrigues(rvec)
+        pitch, yaw, roll = rotation_to_euler(rmat)
+        return pitch, yaw, roll, rvec, tvec
@@ -0,0 +1,110 @@
+import math
+from collections import deque
+import numpy as np
+
+
+class RollingStats:
+    """
+    固定长度滑动窗口统计（替代 deque + max/min/np.mean/np.std 每帧全量重算）
+    - 数据存放在预分配的 NumPy 环形数组中
+    - 维护累加和与平方和，mean/std 为 O(1)（std 与 np.std 一致，为总体标准差）
+    - 单调队列维护窗口最大/最小值，append 均摊 O(1)，查询 O(1)
+    - 每隔一定次数按窗口数据重算累加和，消除浮点累积误差
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self._buf = np.zeros(maxlen, dtype=np.float64)
+        self._resync_every = maxlen * 64
+        self.clear()
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._total = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._max_q = deque()
+        self._min_q = deque()
+
+    def append(self, value):
+        value = float(value)
+        if self._count == self.maxlen:
+            old = self._buf[self._head]
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self._count += 1
+        self._buf[self._head] = value
+        self._head = (self._head + 1) % self.maxlen
+        self._sum += value
+        self._sumsq += value * value
+
+        index = self._total
+        self._total += 1
+        expired = index - self.maxlen
+        while self._max_q and self._max_q[-1][1] <= value:
+            self._max_q.pop()
+        self._max_q.append((index, value))
+        if self._max_q[0][0] <= expired:
+            self._max_q.popleft()
+        while self._min_q and self._min_q[-1][1] >= value:
+            self._min_q.pop()
+        self._min_q.append((index, value))
+        if self._min_q[0][0] <= expired:
+            self._min_q.popleft()
+
+        if self._total % self._resync_every == 0:
+            window = self._buf[:self._count]
+            self._sum = float(window.sum())
+            self._sumsq = float(np.dot(window, window))
+
+    def __len__(self):
+        return self._count
+
+    def max(self):
+        return self._max_q[0][1]
+
+    def min(self):
+        return self._min_q[0][1]
+
+    def range(self):
+        return self._max_q[0][1] - self._min_q[0][1]
+
+    def mean(self):
+        return self._sum / self._count
+
+    def std(self):
+        mean = self._sum / self._count
+        return math.sqrt(max(0.0, self._sumsq / self._count - mean * mean))
+
+    def values(self):
+        """按时间顺序返回窗口数据（拷贝，仅用于调试）"""
+        if self._count < self.maxlen:
+            return self._buf[:self._count].copy()
+        return np.roll(self._buf, -self._head)
+
+
+if __name__ == "__main__":
+    # 微基准：每帧 append 后读取 range/mean/std，对比原 deque + max/min/np.mean/np.std
+    import time
+
+    samples = np.random.default_rng(0).normal(0, 15, 20000)
+
+    history = deque(maxlen=10)
+    start = time.perf_counter()
+    for value in samples:
+        history.append(value)
+        _ = max(history) - min(history), np.mean(history), np.std(history)
+    legacy = (time.perf_counter() - start) / len(samples)
+
+    stats = RollingStats(10)
+    start = time.perf_counter()
+    for value in samples:
+        stats.append(value)
+        _ = stats.range(), stats.mean(), stats.std()
+    rolling = (time.perf_counter() - start) / len(samples)
+
+    print(f"deque + numpy: {legacy * 1e6:.2f} us/帧")
+    print(f"RollingStats : {rolling * 1e6:.2f} us/帧（{legacy / rolling:.1f}x）")
+    print(f"结果一致: {np.isclose(stats.std(), np.std(history)) and np.isclose(stats.range(), max(history) - min(history))}")
@@ -0,0 +1,98 @@
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+
+class FrameRef:
+    """消费者拿到的帧引用：seq 为帧序号，frame 为只读视图（不拷贝）"""
+    __slots__ = ("seq", "index", "frame")
+
+    def __init__(self, seq, index, frame):
+        self.seq = seq
+        self.index = index
+        self.frame = frame
+
+
+class FrameBus:
+    """
+    摄像头帧总线（单生产者、多消费者）
+    - 预分配 pool_size 块帧缓冲，生产者直接把新帧读入空闲缓冲，发布时只更新序号
+    - 消费者在条件变量上等待比自己上次处理更新的序号，拿到最新帧的只读视图，全程零拷贝
+    - 每块缓冲带引用计数，消费者持有期间不会被生产者覆盖；
+      pool_size >= 消费者数 + 2 时生产者总能拿到空闲缓冲
+    """
+
+    def __init__(self, pool_size=4):
+        self.pool_size = pool_size
+        self._cond = threading.Condition()
+        self._buffers = []
+        self._views = []
+        self._refcount = [0] * pool_size
+        self._latest = -1
+        self.seq = 0
+        self.closed = False
+
+    def _allocate(self, shape, dtype):
+        self._buffers = [np.empty(shape, dtype=dtype) for _ in range(self.pool_size)]
+        self._views = []
+        for buf in self._buffers:
+            view = buf.view()
+            view.flags.writeable = False
+            self._views.append(view)
+        self._refcount = [0] * self.pool_size
+        self._latest = -1
+
+    # === 生产者 ===
+    def acquire_write_buffer(self, shape, dtype=np.uint8):
+        """取一块空闲缓冲用于写入下一帧，返回 (index, buffer)；总线关闭时返回 (None, None)"""
+        with self._cond:
+            if not self._buffers or self._buffers[0].shape != tuple(shape) or self._buffers[0].dtype != dtype:
+                # 首帧或分辨率变化：等所有消费者释放后重新分配
+                self._cond.wait_for(lambda: self.closed or not any(self._refcount))
+                if self.closed:
+                    return None, None
+                self._allocate(shape, dtype)
+            while not self.closed:
+                for index in range(self.pool_size):
+                    if index != self._latest and self._refcount[index] == 0:
+                        return index, self._buffers[index]
+                self._cond.wait()
+            return None, None
+
+    def publish(self, index):
+        with self._cond:
+            self.seq += 1
+            self._latest = index
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    # === 消费者 ===
+    def wait_frame(self, last_seq, timeout=None):
+        """阻塞到出现比 last_seq 更新的帧，返回 FrameRef（需配对 release）；超时或关闭返回 None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.closed or self.seq > last_seq, timeout):
+                return None
+            if self.closed:
+                return None
+            index = self._latest
+            self._refcount[index] += 1
+            return FrameRef(self.seq, index, self._views[index])
+
+    def release(self, ref):
+        with self._cond:
+            self._refcount[ref.index] -= 1
+            if self._refcount[ref.index] == 0:
+                self._cond.notify_all()
+
+    @contextmanager
+    def latest(self, last_seq, timeout=None):
+        ref = self.wait_frame(last_seq, timeout)
+        try:
+            yield ref
+        finally:
+            if ref is not None:
+                self.release(ref)
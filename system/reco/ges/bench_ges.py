@@ -0,0 +1,70 @@
+"""
+手势识别性能对比（在 system 目录下运行）：
+    python -m reco.ges.bench_ges 录制片段.mp4 [最大帧数]
+以原始行为（每帧全图推理并绘制关键点）为基准，分别输出各性能选项的帧率、p95 单帧耗时、
+检出手的帧比例，以及逐帧识别结果与基准一致的比例
+"""
+import sys
+import time
+import cv2
+import numpy as np
+from reco.ges.ges import GestureRecognizer
+
+
+def load_clip(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_mode(recognizer, frames):
+    """逐帧识别，返回 (每帧耗时列表, 每帧识别到的手势集合, 检出手的帧数)"""
+    durations, gestures, hand_frames = [], [], 0
+    for frame in frames:
+        frame = frame.copy()  # 绘制会改写帧，各模式使用相同的输入
+        start = time.perf_counter()
+        recognizer.process(frame)
+        durations.append(time.perf_counter() - start)
+        gestures.append(frozenset(recognizer.detected_gestures))
+        hand_frames += recognizer.hand_count > 0
+    return durations, gestures, hand_frames
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    frames = load_clip(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 300)
+    print(f"读取 {len(frames)} 帧")
+
+    def ignore(_):
+        pass
+
+    modes = {
+        "原始(绘制+全图)(基准)": GestureRecognizer(ignore, debug_display=True),
+        "不绘制": GestureRecognizer(ignore),
+        "缩小推理(0.5倍)": GestureRecognizer(ignore, infer_scale=0.5),
+    }
+    reference = None
+    for name, recognizer in modes.items():
+        durations, gestures, hand_frames = run_mode(recognizer, frames)
+        fps = len(durations) / sum(durations) if durations else 0.0
+        line = (f"{name}: {fps:.1f} FPS（平均 {np.mean(durations) * 1000:.1f} ms/帧，"
+                f"p95 {np.percentile(durations, 95) * 1000:.1f} ms）"
+                f"，检出手 {hand_frames / len(durations) * 100:.1f}% 帧")
+        if reference is None:
+            reference = gestures
+        else:
+            agree = sum(a == b for a, b in zip(reference, gestures)) / len(gestures)
+            line += f"，结果与基准一致 {agree * 100:.1f}%"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
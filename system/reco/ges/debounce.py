@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+class _GestureState:
+    __slots__ = ("first_seen", "last_seen", "active", "last_emit")
+
+    def __init__(self):
+        self.first_seen = None
+        self.last_seen = None
+        self.active = False
+        self.last_emit = None
+
+
+class GestureDebouncer:
+    """
+    手势时序状态机（类似 FaceRecognizer.set_statue 只在状态变化时回调）
+    - 保持时间 hold_time：手势需连续出现这么久才算成立（挥手本身依赖运动，默认不需要保持）
+    - 迟滞 release_time：手势消失不超过该时长（漏检的几帧）视为仍在持续，不会重新计时或再次触发
+    - 冷却 cooldown：同一手势两次触发之间的最小间隔
+    每次手势“出现”只产生一次事件，其余帧计入 suppressed
+    """
+
+    def __init__(self, hold_time=0.3, release_time=0.5, cooldown=2.0, hold_overrides=None):
+        self.hold_time = hold_time
+        self.release_time = release_time
+        self.cooldown = cooldown
+        self.hold_overrides = {"挥手": 0.0} if hold_overrides is None else dict(hold_overrides)
+        self._states = {}
+        self.emitted = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def update(self, gestures, now=None):
+        """传入本帧识别到的手势集合，返回需要触发的手势列表"""
+        now = time.monotonic() if now is None else now
+        fired = []
+        with self._lock:
+            for gesture in gestures:
+                state = self._states.get(gesture)
+                if state is None:
+                    state = self._states[gesture] = _GestureState()
+                if state.first_seen is None:
+                    state.first_seen = now
+                state.last_seen = now
+
+                hold = self.hold_overrides.get(gesture, self.hold_time)
+                if (not state.active and now - state.first_seen >= hold
+                        and (state.last_emit is None or now - state.last_emit >= self.cooldown)):
+                    state.active = True
+                    state.last_emit = now
+                    self.emitted += 1
+                    fired.append(gesture)
+                else:
+                    self.suppressed += 1
+
+            # 超过迟滞时间仍未出现的手势视为结束，下次出现重新计时
+            for gesture, state in self._states.items():
+                if (gesture not in gestures and state.last_seen is not None
+                        and now - state.last_seen > self.release_time):
+                    state.first_seen = None
+                    state.last_seen = None
+                    state.active = False
+        return fired
+
+    def reset(self):
+        with self._lock:
+            self._states.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "emitted": self.emitted,
+                "suppressed": self.suppressed,
+                "active": [g for g, s in self._states.items() if s.active]
+            }
@@ -2,13 +2,23 @@ import cv2
 import mediapipe as mp
 import math
 import time
-from collections import deque
+import numpy as np
+from reco.ges.debounce import GestureDebouncer
+from reco.ges.hand_tracker import HandTracker
+
+# 五根手指（拇指、食指、中指、无名指、小拇指）计算夹角所用的关键点：
+# 向量1 = 手腕(0) - 指根侧关节，向量2 = 指尖前一关节 - 指尖
+FINGER_BASE = [2, 6, 10, 14, 18]
+FINGER_JOINT = [3, 7, 11, 15, 19]
+FINGER_TIP = [4, 8, 12, 16, 20]
 
 class GestureRecognizer:
-    def __init__(self, on_ges_change):
+    def __init__(self, on_ges_change, debouncer=None, debug_display=False, infer_scale=1.0):
         # 初始化MediaPipe Hands和Drawing工具
         self.mp_hands = mp.solutions.hands
         self.mp_drawing = mp.solutions.drawing_utils
+        # 视频模式：手被跟踪期间 MediaPipe 由上一帧关键点推出手部区域，跳过手掌检测，
+        # 只有首帧或跟踪置信度低于 min_tracking_confidence 时才重新做全图手掌检测
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
             max_num_hands=2,
@@ -16,10 +26,23 @@ class GestureRecognizer:
             min_tracking_confidence=0.7
         )
         self.cap = None
-        self.gesture_history = {}
+
+        # 性能选项（相互独立，可单独开启）：
+        # - debug_display：只有接了调试显示时才把关键点画到帧上
+        # - infer_scale：推理前把图像缩小，关键点是归一化坐标，直接映射回原图；缩得过小时远处的手会漏检
+        # 不另设"每 N 帧全图检测、其余帧裁剪推理"的选项：上面的视频模式跟踪期间本就跳过手掌检测，
+        # 裁剪区域逐帧移动反而会破坏跟踪（实测比全图更慢），降低推理开销用 infer_scale
+        self.debug_display = debug_display
+        self.infer_scale = infer_scale
+        self.hand_count = 0  # 最近一帧检出的手数
+
+        # 按左右手和手腕位置跨帧匹配，每只手的历史独立且会随手消失而过期
+        self.hand_tracker = HandTracker()
         self.detected_gestures = []
 
         self.on_ges_change = on_ges_change
+        # 逐帧识别结果经状态机过滤，每次手势出现只回调一次
+        self.debouncer = debouncer or GestureDebouncer()
         
         # self.running = False
     @staticmethod
@@ -36,73 +59,63 @@ class GestureRecognizer:
             angle_ = 180
         return angle_
 
-    def hand_angle(self, hand_landmarks):
-        """计算手指关节的角度列表"""
-        angle_list = []
-        # 拇指
-        angle = self.vector_2d_angle(
-            ((hand_landmarks[0][0] - hand_landmarks[2][0]), (hand_landmarks[0][1] - hand_landmarks[2][1])),
-            ((hand_landmarks[3][0] - hand_landmarks[4][0]), (hand_landmarks[3][1] - hand_landmarks[4][1]))
-        )
-        angle_list.append(angle)
-
-        # 食指
-        angle = self.vector_2d_angle(
-            ((hand_landmarks[0][0] - hand_landmarks[6][0]), (hand_landmarks[0][1] - hand_landmarks[6][1])),
-            ((hand_landmarks[7][0] - hand_landmarks[8][0]), (hand_landmarks[7][1] - hand_landmarks[8][1]))
-        )
-        angle_list.append(angle)
-
-        # 中指
-        angle = self.vector_2d_angle(
-            ((hand_landmarks[0][0] - hand_landmarks[10][0]), (hand_landmarks[0][1] - hand_landmarks[10][1])),
-            ((hand_landmarks[11][0] - hand_landmarks[12][0]), (hand_landmarks[11][1] - hand_landmarks[12][1]))
-        )
-        angle_list.append(angle)
-
-        # 无名指
-        angle = self.vector_2d_angle(
-            ((hand_landmarks[0][0] - hand_landmarks[14][0]), (hand_landmarks[0][1] - hand_landmarks[14][1])),
-            ((hand_landmarks[15][0] - hand_landmarks[16][0]), (hand_landmarks[15][1] - hand_landmarks[16][1]))
-        )
-        angle_list.append(angle)
-
-        # 小拇指
-        angle = self.vector_2d_angle(
-            ((hand_landmarks[0][0] - hand_landmarks[18][0]), (hand_landmarks[0][1] - hand_landmarks[18][1])),
-            ((hand_landmarks[19][0] - hand_landmarks[20][0]), (hand_landmarks[19][1] - hand_landmarks[20][1]))
+    @staticmethod
+    def landmarks_array(multi_hand_landmarks, width, height):
+        """所有手的 21 个关键点一次转换为 (手数, 21, 2) 的像素坐标数组（与原 int() 截断一致）"""
+        coords = np.array(
+            [[(lm.x, lm.y) for lm in hand.landmark] for hand in multi_hand_landmarks],
+            dtype=np.float64
         )
-        angle_list.append(angle)
+        return (coords * (width, height)).astype(np.int32)
 
-        return angle_list
+    @staticmethod
+    def hand_angles(hands):
+        """
+        向量化计算所有手的手指夹角，hands: (手数, 21, 2) -> (手数, 5)，单位为度
+        余弦值裁剪到 [-1, 1]，零长度向量（关键点重合）按原逻辑返回 180
+        """
+        hands = np.asarray(hands, dtype=np.float64)
+        v1 = hands[:, :1, :] - hands[:, FINGER_BASE, :]
+        v2 = hands[:, FINGER_JOINT, :] - hands[:, FINGER_TIP, :]
+        dot = np.einsum("hfi,hfi->hf", v1, v2)
+        denom = np.linalg.norm(v1, axis=2) * np.linalg.norm(v2, axis=2)
+        valid = denom > 0
+        cos = np.divide(dot, denom, out=np.zeros_like(dot), where=valid)
+        angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+        angles[~valid] = 180.0
+        return angles
 
-    def recognize_gesture(self, angle_list, history_x, move_thr=30):
-        """手势识别，识别挥手、握拳和竖大拇指"""
+    def hand_angle(self, hand_landmarks):
+        """计算单只手的手指关节角度列表"""
+        return self.hand_angles(np.asarray(hand_landmarks)[None])[0].tolist()
+
+    def recognize_gesture(self, angle_list, wave_speed=0.0, speed_thr=400):
+        """
+        手势识别，识别挥手、握拳和竖大拇指
+        wave_speed 为该手手腕在时间窗口内的水平速度（像素/秒），见 HandTrack.horizontal_speed
+        """
         thr_angle = 65  # 手指弯曲的阈值
         thr_angle_s = 50  # 手指伸直的阈值
 
-        # 判断手指状态
-        thumb_straight = angle_list[0] < thr_angle_s
-        index_straight = angle_list[1] < thr_angle_s
-        middle_straight = angle_list[2] < thr_angle_s
-        ring_straight = angle_list[3] < thr_angle_s
-        pinky_straight = angle_list[4] < thr_angle_s
+        # 判断手指状态（angle_list 可以是列表或 hand_angles 输出的一行）
+        angles = np.asarray(angle_list)
+        straight = angles < thr_angle_s
+        thumb_straight = straight[0]
+        index_straight, middle_straight, ring_straight, pinky_straight = straight[1:]
 
         # 判断所有手指是否伸直（用于挥手检测）
-        is_all_fingers_open = all([index_straight, middle_straight, ring_straight, pinky_straight])
+        is_all_fingers_open = bool(straight[1:].all())
 
-        # 挥手检测（需要所有手指伸直且有水平移动）
-        if is_all_fingers_open and len(history_x) >= 2:
-            x_diff = abs(history_x[-1] - history_x[-2])
-            if x_diff > move_thr:
-                return "挥手"
+        # 挥手检测（需要所有手指伸直且水平移动足够快）
+        if is_all_fingers_open and wave_speed > speed_thr:
+            return "挥手"
 
         # 竖大拇指（只有拇指伸直，其他手指弯曲）
         if thumb_straight and not index_straight and not middle_straight and not ring_straight and not pinky_straight:
             return "拇指向上"
 
         # 握拳（所有手指都弯曲）
-        if all(angle > thr_angle for angle in angle_list):
+        if (angles > thr_angle).all():
             return "握拳"
 
         return ""
@@ -112,48 +125,56 @@ class GestureRecognizer:
     #     self.running = True
     #     return True
 
+    def _infer(self, hands, image):
+        """按 infer_scale 缩小后转 RGB 并推理（先缩小再转色，转色的开销也随之减少）"""
+        if self.infer_scale < 1.0:
+            image = cv2.resize(image, None, fx=self.infer_scale, fy=self.infer_scale,
+                               interpolation=cv2.INTER_AREA)
+        return hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
     def process(self, frame):
         """获取当前手势"""
         # if not self.running:
         #     return None
         
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
-
         self.detected_gestures = []
+        now = time.monotonic()
+
+        results = self._infer(self.hands, frame)
 
         if results.multi_hand_landmarks:
+            # 所有手的关键点一次性转为数组，手指角度一次向量化计算
+            hands = self.landmarks_array(results.multi_hand_landmarks, frame.shape[1], frame.shape[0])
+            self.hand_count = len(hands)
+            angles = self.hand_angles(hands)
+            handedness = [
+                h.classification[0].label for h in results.multi_handedness
+            ] if results.multi_handedness else [None] * len(hands)
+            tracks = self.hand_tracker.update(
+                [(handedness[i], (int(hands[i, 0, 0]), int(hands[i, 0, 1]))) for i in range(len(hands))], now)
             for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                # 绘制手部关键点
-                self.mp_drawing.draw_landmarks(
-                    frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-
-                # 提取手部关键点坐标
-                hand_local = []
-                for lm in hand_landmarks.landmark:
-                    x = int(lm.x * frame.shape[1])
-                    y = int(lm.y * frame.shape[0])
-                    hand_local.append((x, y))
-
-                if hand_local:
-                    # 计算手指角度
-                    angle_list = self.hand_angle(hand_local)
-                    
-                    # 更新手的历史x坐标用于挥手判定
-                    if idx not in self.gesture_history:
-                        self.gesture_history[idx] = deque(maxlen=5)
-                    self.gesture_history[idx].append(hand_local[0][0])  # 手腕x坐标
-                    
-                    # 识别手势
-                    gesture_str = self.recognize_gesture(angle_list, self.gesture_history[idx])
-                    
-                    if gesture_str:
-                        self.detected_gestures.append(gesture_str)
-                        print("新的手势进行回调")
-                        self.on_ges_change(gesture_str)
-                        # cv2.putText(frame, gesture_str, 
-                        #               (hand_local[0][0], hand_local[0][1] - 30),
-                        #               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
+                # 绘制手部关键点（仅调试显示时；帧总线传入的是只读共享帧，此时不绘制）
+                if self.debug_display and frame.flags.writeable:
+                    self.mp_drawing.draw_landmarks(
+                        frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+
+                # 识别手势（挥手按该手轨迹的手腕水平速度判定）
+                gesture_str = self.recognize_gesture(angles[idx], tracks[idx].horizontal_speed())
+
+                if gesture_str:
+                    self.detected_gestures.append(gesture_str)
+                    # cv2.putText(frame, gesture_str,
+                    #               (hands[idx, 0, 0], hands[idx, 0, 1] - 30),
+                    #               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
+
+        else:
+            self.hand_count = 0
+            self.hand_tracker.expire(now)
+
+        # 无手时也要更新状态机，让消失的手势按迟滞时间结束
+        for gesture_str in self.debouncer.update(set(self.detected_gestures), now):
+            print("新的手势进行回调")
+            self.on_ges_change(gesture_str)
 
         return frame
     
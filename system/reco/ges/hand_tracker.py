@@ -0,0 +1,101 @@
+import math
+import time
+from collections import deque
+
+
+class HandTrack:
+    """单只手的跟踪状态：左右手标签、最近手腕位置和定长的 (时间, 手腕x) 历史"""
+
+    def __init__(self, track_id, handedness, wrist, now, history_len):
+        self.id = track_id
+        self.handedness = handedness
+        self.wrist = wrist
+        self.last_seen = now
+        self.history = deque(maxlen=history_len)
+        self.history.append((now, wrist[0]))
+
+    def update(self, wrist, now):
+        self.wrist = wrist
+        self.last_seen = now
+        self.history.append((now, wrist[0]))
+
+    def horizontal_speed(self, window=0.4, min_span=0.15):
+        """
+        时间窗口内手腕水平运动的平均速度（像素/秒，按路径长度计，来回摆动不会相互抵消）
+        窗口内样本跨度不足 min_span 时返回 0，避免两帧抖动被误判
+        """
+        if len(self.history) < 2:
+            return 0.0
+        end_time = self.history[-1][0]
+        path = 0.0
+        start_time = end_time
+        prev_x = self.history[-1][1]
+        for t, x in reversed(self.history):
+            if end_time - t > window:
+                break
+            path += abs(prev_x - x)
+            prev_x = x
+            start_time = t
+        span = end_time - start_time
+        if span < min_span:
+            return 0.0
+        return path / span
+
+
+class HandTracker:
+    """
+    跨帧匹配手部（MediaPipe 每帧输出的手的顺序并不固定）
+    - 只与左右手标签相同的轨迹匹配，按手腕距离就近贪心分配
+    - 距离超过 max_distance 视为新出现的手
+    - 超过 ttl 秒未出现的轨迹被清除，历史随之释放
+    """
+
+    def __init__(self, max_distance=150, ttl=0.5, history_len=30):
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.history_len = history_len
+        self.tracks = {}
+        self._next_id = 1
+
+    def update(self, detections, now=None):
+        """
+        detections: [(handedness, (wrist_x, wrist_y)), ...]
+        返回与 detections 一一对应的 HandTrack 列表
+        """
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+
+        pairs = []
+        for det_idx, (handedness, wrist) in enumerate(detections):
+            for track in self.tracks.values():
+                if track.handedness != handedness:
+                    continue
+                distance = math.hypot(wrist[0] - track.wrist[0], wrist[1] - track.wrist[1])
+                if distance <= self.max_distance:
+                    pairs.append((distance, det_idx, track.id))
+        pairs.sort()
+
+        assigned = [None] * len(detections)
+        used = set()
+        for _, det_idx, track_id in pairs:
+            if assigned[det_idx] is not None or track_id in used:
+                continue
+            track = self.tracks[track_id]
+            track.update(detections[det_idx][1], now)
+            assigned[det_idx] = track
+            used.add(track_id)
+
+        for det_idx, (handedness, wrist) in enumerate(detections):
+            if assigned[det_idx] is None:
+                track = HandTrack(self._next_id, handedness, wrist, now, self.history_len)
+                self._next_id += 1
+                self.tracks[track.id] = track
+                assigned[det_idx] = track
+        return assigned
+
+    def expire(self, now):
+        for track_id in [tid for tid, t in self.tracks.items() if now - t.last_seen > self.ttl]:
+            del self.tracks[track_id]
+
+    def reset(self):
+        self.tracks.clear()
@@ -0,0 +1,87 @@
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# 面部识别与手势识别只会产生以下固定状态（见 FaceRecognizer / GestureRecognizer）
+FACE_STATES = ("注视前方", "点头确认", "摇头拒绝", "低头看手机", "向右说话", "向左说话", "注意力偏离超过3秒")
+GESTURES = ("挥手", "握拳", "拇指向上")
+
+_NUMBER = re.compile(r"(\d+(?:\.\d+)?)")
+# "加速"/"减速" 未给出目标速度时只做相对调整（对应 DRIVING_RULES 速度控制的 acceleration 参数），不臆造绝对速度
+DEFAULT_ACCELERATION = 1.0
+
+
+def rule_based_intent(text: str) -> Dict[str, Any]:
+    """
+    关键词规则解析，返回与大模型回复相同结构（未标准化）的 {"intent", "params"}
+    用于熔断期间的本地兜底，本地桩服务也用它构造回复
+    """
+    if "注意力偏离" in text:
+        return {"intent": "用户姿态", "params": {"用户姿态": "注意力偏离", "持续时间": "超过3秒"}}
+    for state in FACE_STATES:
+        if state in text:
+            return {"intent": "用户姿态", "params": {"用户姿态": state}}
+    for gesture in GESTURES:
+        if gesture in text:
+            return {"intent": "手势控制", "params": {"手势类型": gesture}}
+    if "刹车" in text or "紧急" in text:
+        return {"intent": "紧急制动", "params": {"force_level": 3}}
+    if "加速" in text or "减速" in text:
+        speed = _NUMBER.search(text)
+        if speed:
+            return {"intent": "速度控制", "params": {"速度值": float(speed.group(1))}}
+        sign = -1 if "减速" in text else 1
+        return {"intent": "速度控制", "params": {"加速度": sign * DEFAULT_ACCELERATION}}
+    if "左转" in text:
+        return {"intent": "转向操作", "params": {"转向角": -30}}
+    if "右转" in text:
+        return {"intent": "转向操作", "params": {"转向角": 30}}
+    return {"intent": "语音指令", "params": {"命令内容": text}}
+
+
+class LocalIntentResolver:
+    """
+    封闭词表事件的本地意图解析
+    "[面部] xxx" / "[手势] xxx" 且 xxx 属于固定状态时，直接构造与 parse_api_response 相同结构的
+    {"intent", "params"}，交给 generate_safe_instruction，不再经过大模型；
+    其余输入（自由语音文本等）返回 None，仍走大模型
+    """
+
+    def __init__(self):
+        self._table = {}
+        for state in FACE_STATES:
+            self._table[f"[面部] {state}"] = {
+                "intent": "用户姿态",
+                "params": {"pos_type": state, "action": "默认动作"}
+            }
+        for gesture in GESTURES:
+            self._table[f"[手势] {gesture}"] = {
+                "intent": "手势控制",
+                "params": {"gesture_type": gesture, "action": "默认动作"}
+            }
+        self.resolved = 0
+        self.fallbacks = 0
+        self.total_time = 0.0
+        self._lock = threading.Lock()
+
+    def resolve(self, text: str) -> Optional[Dict[str, Any]]:
+        start = time.perf_counter()
+        entry = self._table.get(text.strip())
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if entry is None:
+                self.fallbacks += 1
+                return None
+            self.resolved += 1
+            self.total_time += elapsed
+        # 返回副本，调用方可以修改
+        return {"intent": entry["intent"], "params": dict(entry["params"])}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "resolved_locally": self.resolved,
+                "sent_to_llm": self.fallbacks,
+                "avg_resolve_us": round(self.total_time / self.resolved * 1e6, 2) if self.resolved else 0.0
+            }
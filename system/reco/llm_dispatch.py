@@ -0,0 +1,210 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# 优先级：数值越小越先处理
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+# 紧急制动与注意力偏离警告类事件优先发送
+URGENT_KEYWORDS = ("紧急制动", "注意力偏离", "刹车")
+
+_STOP = object()
+
+
+def event_priority(text: str) -> int:
+    for keyword in URGENT_KEYWORDS:
+        if keyword in text:
+            return PRIORITY_URGENT
+    return PRIORITY_NORMAL
+
+
+class LLMTimeoutError(TimeoutError):
+    """请求在队列中等待超过其超时时间，未发送"""
+
+
+class Fallback:
+    """
+    handler 的返回值包装：接口超时、调用失败、熔断或回复无法解析时改用兜底得到的结果
+    分发器按 reason 单独计数（不计入 completed），Future 与 on_result 拿到的仍是解包后的 result
+    """
+    __slots__ = ("result", "reason")
+
+    def __init__(self, result, reason):
+        self.result = result
+        self.reason = reason
+
+
+class LLMDispatcher:
+    """
+    大模型调用的异步分发层
+    - 识别器回调只调用 submit() 入队并立即返回，由固定数量的工作线程执行 handler(text, timeout)
+    - 优先队列：紧急事件先出队，同优先级按提交顺序
+    - 每个请求有独立超时：排队已超时的请求直接丢弃，发送时把剩余时间作为该次 HTTP 请求的超时
+    - submit() 返回 Future，可在开始执行前 cancel()；队列满时拒绝新请求
+    - 带 key 提交时新请求取代同 key 的旧请求：旧请求未开始则直接取消，已在执行则丢弃其结果（不回调 on_result）
+    - handler 返回 Fallback 时计入 fallback（按原因分类），与真正完成的调用分开统计
+    """
+
+    def __init__(self, handler, workers=4, max_queue=64, timeout=8.0, name="llm"):
+        self.handler = handler
+        self.timeout = timeout
+        self.name = name
+        self._queue = queue.PriorityQueue(maxsize=max_queue)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.superseded = 0
+        self.fallback = {}
+        # key -> 最新请求的序号 / Future（key 为少量固定取值，如输入模态，不做清理）
+        self._latest = {}
+        self._pending = {}
+        self.rejected = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=100)
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"{name}-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, text, on_result=None, priority=None, timeout=None, handler=None, key=None) -> Future:
+        """
+        入队一个请求；on_result(result) 在工作线程中、请求成功后调用
+        handler 可替换该请求的处理函数（如多模态融合请求），签名同 handler(text, timeout)
+        key 不为空时取代同 key 的旧请求
+        """
+        future = Future()
+        priority = event_priority(text) if priority is None else priority
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            if self._closed:
+                future.set_exception(RuntimeError("分发器已关闭"))
+                return future
+            seq = next(self._seq)
+            try:
+                job = (text, on_result, deadline, future, handler or self.handler, key, seq)
+                self._queue.put_nowait((priority, seq, job))
+            except queue.Full:
+                self.rejected += 1
+                print(f"[{self.name}] 队列已满，丢弃请求: {text}")
+                future.set_exception(queue.Full())
+                return future
+            self.submitted += 1
+            if key is not None:
+                previous = self._pending.get(key)
+                self._latest[key] = seq
+                self._pending[key] = future
+                if previous is not None and previous.cancel():
+                    self.superseded += 1
+        return future
+
+    def _is_stale(self, key, seq):
+        return key is not None and self._latest.get(key, seq) != seq
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is _STOP:
+                break
+            text, on_result, deadline, future, handler, key, seq = job
+            if not future.set_running_or_notify_cancel():
+                with self._lock:
+                    # 被新请求取代的已在 submit 中计数
+                    if not self._is_stale(key, seq):
+                        self.cancelled += 1
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.timed_out += 1
+                print(f"[{self.name}] 请求排队超时，已丢弃: {text}")
+                future.set_exception(LLMTimeoutError(text))
+                continue
+
+            with self._lock:
+                self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = handler(text, timeout=remaining)
+            except Exception as e:
+                with self._lock:
+                    self.in_flight -= 1
+                    self.failed += 1
+                print(f"[{self.name}] 请求失败: {e}")
+                future.set_exception(e)
+                continue
+            reason = None
+            if isinstance(result, Fallback):
+                result, reason = result.result, result.reason
+            with self._lock:
+                self.in_flight -= 1
+                self.latencies.append(time.perf_counter() - started)
+                if reason is None:
+                    self.completed += 1
+                else:
+                    self.fallback[reason] = self.fallback.get(reason, 0) + 1
+                stale = self._is_stale(key, seq)
+                if stale:
+                    self.superseded += 1
+            future.set_result(result)
+            if stale:
+                print(f"[{self.name}] 请求已被新请求取代，丢弃结果: {text}")
+                continue
+            if on_result is not None:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    print(f"[{self.name}] 结果回调异常: {e}")
+
+    def cancel_pending(self):
+        """取消所有尚未开始的请求"""
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP and job[3].cancel():
+                with self._lock:
+                    self.cancelled += 1
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.cancel_pending()
+        for _ in self._workers:
+            # 停止标记排在所有请求之后，且不受 maxsize 限制地阻塞放入
+            self._queue.put((float("inf"), next(self._seq), _STOP))
+        if wait:
+            for worker in self._workers:
+                worker.join(timeout=self.timeout)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "fallback": sum(self.fallback.values()),
+                "fallback_by_reason": dict(self.fallback),
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled,
+                "superseded": self.superseded,
+                "rejected": self.rejected,
+                "avg_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+                "p95_latency_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+                if latencies else 0.0
+            }
@@ -0,0 +1,181 @@
+"""
+大模型请求构造：驾驶规则、输入模式与提示词
+只依赖标准库与 reco.intent_resolver，基准脚本（reco/bench_llm.py）可单独导入而不加载识别模型
+"""
+from typing import Any, Dict
+from reco.intent_resolver import FACE_STATES
+
+# 驾驶规则配置
+DRIVING_RULES = {
+    "速度控制": {
+        "code": "SPEED_CTRL",
+        "params": {"target_speed": "float", "acceleration": "float"},
+        "safety_check": lambda p: 0 <= p.get("target_speed", 0) <= 120
+    },
+    "转向操作": {
+        "code": "STEERING_CTRL",
+        "params": {"angle": "float", "direction": ["left", "right"]},
+        "safety_check": lambda p: -45 <= p.get("angle", 0) <= 45
+    },
+    "紧急制动": {
+        "code": "EMG_BRAKE",
+        "params": {"force_level": [1, 2, 3]},
+        "priority": 0,
+        "safety_check": lambda p: p.get("force_level", 1) in [1, 2, 3]
+    },
+    "手势控制": {
+        "code": "GESTURE_CTRL",
+        "params": {"gesture_type": "str", "action": "str"},
+        "safety_check": lambda p: p.get("gesture_type") in ["挥手", "握拳", "食指指向", "拇指向上"]
+    },
+    "语音指令": {
+        "code": "VOICE_CMD",
+        "params": {"command": "str"},
+        "safety_check": lambda p: True  # 语音指令安全检查在解析阶段处理
+    },
+    "用户姿态": {
+        "code": "USER_POSTURE",
+        "params": {"pos_type": "str", "action": "str"},
+        "safety_check": lambda p: p.get("pos_type") 
+        in ["点头确认", "摇头拒绝", "低头看手机", "向右说话", "向左说话", "注意力偏离超过3秒", "注视前方"]
+    },
+    "协议指令": {
+        "code": "PROTOCOL_CMD",
+        "params": {"protocol_id": "str", "action": "str"},
+        "priority": 1,
+        "safety_check": lambda p: True
+    }
+}
+
+# 紧凑结构化模式：固定的短系统提示 + JSON 输出约束 + 按输入长度确定的 max_tokens，回复直接 json.loads
+LLM_COMPACT_MODE = True
+# 每条结果的 max_tokens 基数（另按输入长度追加，见 compact_max_tokens）
+LLM_COMPACT_MAX_TOKENS = 80
+
+# 输入模式定义
+INPUT_MODES = {
+    "手势识别": ["[手势]", "[视觉焦点]"],
+    "语音识别": ["[语音]", "[协议]", "[规则]"],
+    "面部识别": ["[面部]", "[面部姿态]"],
+    "多模态反馈": ["[多传感器]", "[系统状态]", "[雷达]", "[相机]", "[GPS]"]
+}
+
+# DRIVING_RULES 中以 "str" 声明、但实际取值固定的参数（与对应 safety_check 一致）
+PARAM_ENUMS = {
+    "gesture_type": ("挥手", "握拳", "食指指向", "拇指向上"),
+    "pos_type": FACE_STATES
+}
+
+
+def _compact_schema() -> str:
+    """
+    由 DRIVING_RULES 生成紧凑的枚举式意图/参数约束
+    只列出参数名，枚举参数附带取值（| 分隔），自由文本的 action 参数省略
+    """
+    entries = []
+    for intent, rule in DRIVING_RULES.items():
+        fields = []
+        for name, spec in rule["params"].items():
+            if isinstance(spec, list):
+                fields.append(f"{name}={'|'.join(str(v) for v in spec)}")
+            elif name in PARAM_ENUMS:
+                fields.append(f"{name}={'|'.join(PARAM_ENUMS[name])}")
+            elif name != "action":
+                fields.append(name)
+        entries.append(f"{intent}({','.join(fields)})")
+    return "intent(params)取自：" + "；".join(entries)
+
+
+def build_compact_system_prompt() -> str:
+    """单条输入的紧凑系统提示；内容固定，可被接口侧的前缀缓存复用"""
+    return "只输出JSON{\"intent\":,\"params\":{}}，" + _compact_schema()
+
+
+def build_compact_multimodal_prompt() -> str:
+    """融合请求的紧凑系统提示，每行 "序号. (模式) 输入" 对应 results 中的一项"""
+    return "逐行解析，只输出JSON{\"results\":[{\"index\":序号,\"intent\":,\"params\":{}}]}，" + _compact_schema()
+
+
+COMPACT_SYSTEM_PROMPT = build_compact_system_prompt()
+COMPACT_MULTIMODAL_PROMPT = build_compact_multimodal_prompt()
+
+
+def compact_max_tokens(text: str, items: int = 1) -> int:
+    """
+    紧凑模式的 max_tokens：每条结果的固定开销 + 输入长度
+    语音指令等会在参数中原样带回输入文本，按输入字符数追加，避免长指令的 JSON 被截断
+    """
+    return LLM_COMPACT_MAX_TOKENS * items + len(text)
+
+
+def build_llm_request(text: str, input_mode: str, compact: bool = LLM_COMPACT_MODE) -> Dict[str, Any]:
+    """构造 chat.completions.create 的参数（不含超时）"""
+    if compact:
+        return {
+            "model": "qwen-plus",
+            "messages": [
+                {"role": "system", "content": COMPACT_SYSTEM_PROMPT},
+                {"role": "user", "content": text}
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": compact_max_tokens(text),
+            "temperature": 0
+        }
+
+    system_prompt = "你是一个智能驾驶助手，根据提供的情况选择合适的指令，请严格按JSON格式返回指令。其中intent只能从 速度控制、转向操作、紧急制动、手势控制、语音指令、协议指令、用户姿态 中选取"
+
+    # 根据不同输入模式调整系统提示
+    if input_mode == "手势识别":
+        system_prompt += "特别注意处理手势相关的输入。"
+    elif input_mode == "语音识别":
+        system_prompt += "特别注意处理语音指令和系统协议触发。"
+    elif input_mode == "面部识别":
+        system_prompt += "特别注意处理视觉焦点、用户姿态相关的输入。"
+
+    return {
+        "model": "qwen-plus",
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": f"""严格按JSON格式解析驾驶指令：
+                        输入：{text}
+                        要求字段：intent(操作类型), params(根据输入类型可包含速度值/转向角/手势类型/用户姿态/命令内容等)"""
+            }
+        ]
+    }
+
+
+def build_multimodal_request(lines: str, count: int, compact: bool = LLM_COMPACT_MODE) -> Dict[str, Any]:
+    """构造融合请求的参数，lines 为每行 "序号. (模式) 输入" 的多条输入"""
+    if compact:
+        return {
+            "model": "qwen-plus",
+            "messages": [
+                {"role": "system", "content": COMPACT_MULTIMODAL_PROMPT},
+                {"role": "user", "content": lines}
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": compact_max_tokens(lines, count),
+            "temperature": 0
+        }
+
+    system_prompt = ("你是一个智能驾驶助手，同一时刻会收到来自多个模态（" + "、".join(INPUT_MODES) +
+                     "）的输入，请逐条选择合适的指令，严格按JSON格式返回。其中intent只能从 "
+                     "速度控制、转向操作、紧急制动、手势控制、语音指令、协议指令、用户姿态 中选取")
+    return {
+        "model": "qwen-plus",
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {
+                "role": "user",
+                "content": f"""严格按JSON格式逐条解析以下多模态驾驶输入（共{count}条）：
+{lines}
+返回格式：{{"results": [{{"index": 序号, "intent": 操作类型, "params": {{...}}}}]}}，每条输入对应一项，
+params 根据输入类型可包含速度值/转向角/手势类型/用户姿态/命令内容等"""
+            }
+        ]
+    }
@@ -0,0 +1,139 @@
+"""
+本地大模型桩服务（兼容 OpenAI chat/completions 接口），用于在不访问 DashScope 的情况下联调与压测：
+    python -m reco.llm_stub [端口=8001] [延迟秒=0.2] [模式=ok]
+    DASHSCOPE_BASE_URL=http://127.0.0.1:8001/v1 python app.py
+按关键词返回与 qwen-plus 同结构的 JSON 指令
+运行中切换模式（用于验证熔断器的打开/半开/关闭）：
+    curl -X POST http://127.0.0.1:8001/stub/mode/slow     # ok / slow / error
+按脚本逐个请求指定模式（用完后恢复为当前模式），例如先连续失败 3 次再恢复正常：
+    curl -X POST http://127.0.0.1:8001/stub/script/error,error,error,ok
+"""
+import json
+import re
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from reco.intent_resolver import rule_based_intent
+
+# 桩服务模式：ok 正常回复；slow 每次额外等待 slow_delay 秒；error 返回 HTTP 500
+STUB_MODES = ("ok", "slow", "error")
+
+
+def stub_reply(text: str) -> dict:
+    """根据输入文本构造与真实接口返回结构一致的指令"""
+    return rule_based_intent(text)
+
+
+def stub_multimodal_reply(text: str):
+    """融合请求（每行 "序号. (模式) 输入"）逐条构造结果；不是融合请求时返回 None"""
+    items = re.findall(r"^(\d+)\. (.*)$", text, flags=re.MULTILINE)
+    if not items:
+        return None
+    return {"results": [dict(stub_reply(line), index=int(index)) for index, line in items]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持长连接，客户端连接池可复用
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.startswith("/stub/mode/"):
+            mode = self.path.rsplit("/", 1)[1]
+            if mode not in STUB_MODES:
+                self._send_json({"error": f"未知模式: {mode}"}, status=400)
+                return
+            self.server.mode = mode
+            self._send_json({"mode": mode})
+            return
+        if self.path.startswith("/stub/script/"):
+            modes = [mode for mode in self.path.rsplit("/", 1)[1].split(",") if mode]
+            unknown = [mode for mode in modes if mode not in STUB_MODES]
+            if unknown:
+                self._send_json({"error": f"未知模式: {','.join(unknown)}"}, status=400)
+                return
+            with self.server.lock:
+                self.server.script = deque(modes)
+            self._send_json({"script": modes})
+            return
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = json.loads(body)
+        text = request["messages"][-1]["content"]
+        # 先确定本次请求的模式再计数，测试看到计数变化后切换模式不会影响这次请求
+        with self.server.lock:
+            mode = self.server.script.popleft() if self.server.script else self.server.mode
+            self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if mode == "slow":
+            time.sleep(self.server.slow_delay)
+        elif mode == "error":
+            self._send_json({"error": {"message": "stub error", "type": "server_error"}}, status=500)
+            return
+        reply = stub_multimodal_reply(text) or stub_reply(text)
+        content = json.dumps(reply, ensure_ascii=False)
+        if "response_format" not in request:
+            # 未约束输出格式时模拟模型常见的回复：说明文字 + ```json 代码块
+            content = f"根据输入，解析结果如下：\n```json\n{json.dumps(reply, ensure_ascii=False, indent=2)}\n```"
+        finish_reason = "stop"
+        max_tokens = request.get("max_tokens")
+        if max_tokens is not None and len(content) > max_tokens:
+            # 按一个字符一个 token 近似模拟 max_tokens 截断
+            content, finish_reason = content[:max_tokens], "length"
+        self._send_json({
+            "id": f"stub-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }],
+            "usage": {"prompt_tokens": len(body), "completion_tokens": len(content),
+                      "total_tokens": len(body) + len(content)}
+        })
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, delay=0.0, host="127.0.0.1", mode="ok", slow_delay=5.0, script=()):
+    """
+    在后台线程启动桩服务，返回 (server, base_url)；port=0 时自动分配端口
+    script 为逐个请求使用的模式序列，用完后使用 mode
+    测试中可直接修改 server.mode / server.script，server.requests 为已收到的 chat/completions 请求数
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.mode = mode
+    server.slow_delay = slow_delay
+    server.script = deque(script)
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8001
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    mode = sys.argv[3] if len(sys.argv) > 3 else "ok"
+    server, base_url = start_stub_server(port, delay, mode=mode)
+    print(f"大模型桩服务已启动: {base_url}（延迟 {delay}s，模式 {mode}），Ctrl+C 退出")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
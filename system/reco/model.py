@@ -2,80 +2,79 @@ import json
 import os
 import threading 
 from typing import Dict, Any, List, Union
-from openai import OpenAI
+import httpx
+from openai import OpenAI, APITimeoutError
+from reco.llm_dispatch import LLMDispatcher, Fallback, event_priority, PRIORITY_URGENT
+from reco.event_fusion import EventFusion
+from reco.intent_resolver import LocalIntentResolver, rule_based_intent
+from reco.llm_prompt import (DRIVING_RULES, INPUT_MODES, LLM_COMPACT_MODE, build_llm_request,
+                             build_multimodal_request)
+from reco.circuit_breaker import CircuitBreaker, CircuitOpenError
+from reco.response_cache import ResponseCache
 from reco.ges.ges import GestureRecognizer
 from reco.face.face import FaceRecognizer  # 假设你的 face 识别模块是 face.py 中的 FaceRecognizer 类
 import cv2
 import time
 from reco.whis.wav_text import VoiceRecognizer
 from flask import Response, session
-from logs.log import insert_log
-
-# 驾驶规则配置
-DRIVING_RULES = {
-    "速度控制": {
-        "code": "SPEED_CTRL",
-        "params": {"target_speed": "float", "acceleration": "float"},
-        "safety_check": lambda p: 0 <= p.get("target_speed", 0) <= 120
-    },
-    "转向操作": {
-        "code": "STEERING_CTRL",
-        "params": {"angle": "float", "direction": ["left", "right"]},
-        "safety_check": lambda p: -45 <= p.get("angle", 0) <= 45
-    },
-    "紧急制动": {
-        "code": "EMG_BRAKE",
-        "params": {"force_level": [1, 2, 3]},
-        "priority": 0,
-        "safety_check": lambda p: p.get("force_level", 1) in [1, 2, 3]
-    },
-    "手势控制": {
-        "code": "GESTURE_CTRL",
-        "params": {"gesture_type": "str", "action": "str"},
-        "safety_check": lambda p: p.get("gesture_type") in ["挥手", "握拳", "食指指向", "拇指向上"]
-    },
-    "语音指令": {
-        "code": "VOICE_CMD",
-        "params": {"command": "str"},
-        "safety_check": lambda p: True  # 语音指令安全检查在解析阶段处理
-    },
-    "用户姿态": {
-        "code": "USER_POSTURE",
-        "params": {"pos_type": "str", "action": "str"},
-        "safety_check": lambda p: p.get("pos_type") 
-        in ["点头确认", "摇头拒绝", "低头看手机", "向右说话", "向左说话", "注意力偏离超过3秒", "注视前方"]
-    },
-    "协议指令": {
-        "code": "PROTOCOL_CMD",
-        "params": {"protocol_id": "str", "action": "str"},
-        "priority": 1,
-        "safety_check": lambda p: True
-    }
-}
-
-# 输入模式定义
-INPUT_MODES = {
-    "手势识别": ["[手势]", "[视觉焦点]"],
-    "语音识别": ["[语音]", "[协议]", "[规则]"],
-    "面部识别": ["[面部]", "[面部姿态]"],
-    "多模态反馈": ["[多传感器]", "[系统状态]", "[雷达]", "[相机]", "[GPS]"]
-}
+from logs.log import insert_logs
+
+# 大模型接口地址（可用环境变量指向本地桩服务 reco/llm_stub.py）、并发数与单次请求超时（秒）
+LLM_BASE_URL = os.getenv("DASHSCOPE_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
+LLM_WORKERS = 4
+LLM_TIMEOUT = 8.0
+# 熔断：单次调用超过 LLM_SLOW_CALL 秒视为慢调用，打开后 LLM_BREAKER_RESET 秒开始半开探测
+LLM_SLOW_CALL = 3.0
+LLM_BREAKER_RESET = 15.0
+# 大模型解析结果缓存：条数上限、有效期（秒）、持久化数据库（None 表示只用内存）
+LLM_CACHE_SIZE = 512
+LLM_CACHE_TTL = 24 * 3600
+LLM_CACHE_DB = "database.db"
+# 多模态事件融合时间窗（秒）：窗口内各模态的事件合并为一次大模型调用、一次日志写入
+FUSION_WINDOW = 0.15
+# 回复无法解析时的默认结果；与真实的"停车"回复相同，因此用 fallback_reason 标记区分，不按值比较
+FALLBACK_RESPONSE = {"intent": "速度控制", "params": {"target_speed": 0}}
+
 
 class DrivingSystem:
-    def __init__(self, output_queue, output_condition, username='system', role='system'):
+    def __init__(self, output_queue, output_condition, username='system', role='system',
+                 in_process_recognizers=True):
         os.environ["DASHSCOPE_API_KEY"] = "sk-8e2f065fa5314b0b91deaf67ca6e969f"
         api_key = os.getenv("DASHSCOPE_API_KEY")
         if not api_key:
             raise ValueError("请设置 DASHSCOPE_API_KEY 环境变量")
 
+        # 所有工作线程共用一个长连接池；超时由分发器按请求控制，不做自动重试
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=LLM_WORKERS, max_keepalive_connections=LLM_WORKERS),
+            timeout=LLM_TIMEOUT)
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1")
+            base_url=LLM_BASE_URL,
+            http_client=self.http_client,
+            max_retries=0)
+        # 接口慢或不可用时熔断，期间改用本地规则解析，不再等待超时
+        self.breaker = CircuitBreaker("qwen-plus", slow_call_threshold=LLM_SLOW_CALL,
+                                      reset_timeout=LLM_BREAKER_RESET)
+        # 识别器回调只入队，大模型调用在分发器的工作线程中进行
+        self.dispatcher = LLMDispatcher(self.process_driving_command, workers=LLM_WORKERS, timeout=LLM_TIMEOUT)
+        # 面部/手势的固定状态在本地直接解析，只有自由文本才调用大模型
+        self.intent_resolver = LocalIntentResolver()
+        # 相同输入（模式 + 预处理后文本）直接复用上次的解析结果
+        self.response_cache = ResponseCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_DB)
+        # 各模态回调先进入融合队列，紧急事件（注意力偏离等）不等待时间窗
+        self.fusion = EventFusion(self.process_event_batch, window=FUSION_WINDOW,
+                                  is_urgent=lambda text: event_priority(text) == PRIORITY_URGENT)
+        self.compact_prompt = LLM_COMPACT_MODE
         self.preserved_terms = ["加速", "减速", "左转", "右转", "米", "km/h", "障碍物"]
         self.voice_recognizer = VoiceRecognizer(on_transcription=self.handle_transcription)
         
-        self.gesture_recognizer = GestureRecognizer(on_ges_change=self.handle_ges_change)
-        self.face_recognizer = FaceRecognizer(on_status_change=self.handle_status_change)
+        # 识别器在子进程中运行时（见 reco/process_pool.py），主进程不再加载面部/手势模型
+        self.gesture_recognizer = None
+        self.face_recognizer = None
+        if in_process_recognizers:
+            self.gesture_recognizer = GestureRecognizer(on_ges_change=self.handle_ges_change)
+            self.face_recognizer = FaceRecognizer(on_status_change=self.handle_status_change)
         self.output_queue = output_queue
         self.output_condition = output_condition
         self.username = username
@@ -123,6 +122,8 @@ class DrivingSystem:
         """标准化参数格式"""
         if "速度值" in params:
             return {"target_speed": params["速度值"]}
+        if "加速度" in params:
+            return {"acceleration": params["加速度"]}
         if "转向角" in params:
             return {"angle": params["转向角"]}
         
@@ -156,81 +157,152 @@ class DrivingSystem:
 
             # 尝试解析JSON
             data = json.loads(content)
-            
-            # 标准化意图
-            intent_map = {
-                "减速": "速度控制",
-                "加速": "速度控制",
-                "左转": "转向操作",
-                "右转": "转向操作",
-                "手势": "手势控制",
-                "语音命令": "语音指令",
-                "面部": "用户姿态",
-                "协议": "协议指令"
-            }
-            
-            intent = data.get("intent", "")
-            normalized_params = self.normalize_params(intent, data.get("params", {}))
-            
-            # 🔧 添加调试日志
-            print(f"🔍 API解析调试:")
-            print(f"   原始intent: {intent}")
-            print(f"   标准化intent: {intent_map.get(intent, intent)}")
-            print(f"   原始params: {data.get('params', {})}")
-            print(f"   标准化params: {normalized_params}")
-            
-            return {
-                "intent": intent_map.get(intent, intent),
-                "params": normalized_params
-            }
-            
-        except (json.JSONDecodeError, IndexError) as e:
+            return self.normalize_response(data)
+
+        except (json.JSONDecodeError, IndexError, AttributeError) as e:
             print(f"解析错误: {str(e)}\nAPI返回内容: {content}")
-            return {"intent": "速度控制", "params": {"target_speed": 0}}
+            return self.parse_failure()
 
-    def call_deepseek_driving_api(self, text: str) -> Dict[str, Any]:
-        # 根据输入类型确定系统提示
-        input_mode = self.identify_input_mode(text)
-        system_prompt = "你是一个智能驾驶助手，根据提供的情况选择合适的指令，请严格按JSON格式返回指令。其中intent只能从 速度控制、转向操作、紧急制动、手势控制、语音指令、协议指令、用户姿态 中选取"
+    @staticmethod
+    def parse_failure() -> Dict[str, Any]:
+        """解析失败时返回默认结果的副本，带 fallback_reason 标记（不写入缓存）"""
+        return dict(FALLBACK_RESPONSE, params=dict(FALLBACK_RESPONSE["params"]), fallback_reason="parse_error")
+
+    def normalize_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """标准化解析后的单条指令（意图别名与参数名）"""
+        # 标准化意图
+        intent_map = {
+            "减速": "速度控制",
+            "加速": "速度控制",
+            "左转": "转向操作",
+            "右转": "转向操作",
+            "手势": "手势控制",
+            "语音命令": "语音指令",
+            "面部": "用户姿态",
+            "协议": "协议指令"
+        }
         
-        # 根据不同输入模式调整系统提示
-        if input_mode == "手势识别":
-            system_prompt += "特别注意处理手势相关的输入。"
-        elif input_mode == "语音识别":
-            system_prompt += "特别注意处理语音指令和系统协议触发。"
-        elif input_mode == "面部识别":
-            system_prompt += "特别注意处理视觉焦点、用户姿态相关的输入。"
+        intent = data.get("intent", "")
+        normalized_params = self.normalize_params(intent, data.get("params", {}))
+        
+        # 🔧 添加调试日志
+        print(f"🔍 API解析调试:")
+        print(f"   原始intent: {intent}")
+        print(f"   标准化intent: {intent_map.get(intent, intent)}")
+        print(f"   原始params: {data.get('params', {})}")
+        print(f"   标准化params: {normalized_params}")
         
+        return {
+            "intent": intent_map.get(intent, intent),
+            "params": normalized_params
+        }
+
+    def parse_compact_response(self, content: str) -> Dict[str, Any]:
+        """紧凑模式的严格解析：回复必须是单个 JSON 对象且 intent 属于 DRIVING_RULES"""
         try:
-            completion = self.client.chat.completions.create(
-                model="qwen-plus",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""严格按JSON格式解析驾驶指令：
-                        输入：{text}
-                        要求字段：intent(操作类型), params(根据输入类型可包含速度值/转向角/手势类型/用户姿态/命令内容等)"""
-                    }
-                ]
-            )
-            
-            content = completion.choices[0].message.content
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            print(f"解析错误: {str(e)}\nAPI返回内容: {content}")
+            return self.parse_failure()
+        if (not isinstance(data, dict) or data.get("intent") not in DRIVING_RULES
+                or not isinstance(data.get("params", {}), dict)):
+            print(f"解析错误: 回复不符合约束\nAPI返回内容: {content}")
+            return self.parse_failure()
+        return self.normalize_response(data)
 
-            # 输出调试信息
-            print("--------------------------------------")
-            print(f"API返回内容: {content}")
-            print("--------------------------------------")
+    def call_deepseek_driving_api(self, text: str, timeout: float = None) -> Dict[str, Any]:
+        # 根据输入类型确定提示（紧凑模式下系统提示固定）
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            content, truncated = self.request_completion(
+                build_llm_request(text, self.identify_input_mode(text), self.compact_prompt), timeout)
+            if not self.compact_prompt:
+                return self.parse_api_response(content)
+            response = self.parse_compact_response(content)
+            if not truncated and "fallback_reason" not in response:
+                return response
+            # 紧凑模式的回复被 max_tokens 截断或不符合约束时，在剩余时间内用原始提示重试一次
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return response
+            print("紧凑模式回复不完整，使用原始提示重试")
+            content, _ = self.request_completion(
+                build_llm_request(text, self.identify_input_mode(text), compact=False), remaining)
             return self.parse_api_response(content)
-                
+
+        except CircuitOpenError:
+            print("接口熔断中，使用本地规则解析")
+            return self.local_fallback(text, "circuit_open")
         except Exception as e:
             print(f"API调用错误: {str(e)}")
-            return {"intent": "速度控制", "params": {"target_speed": 0}}
-    
-    
+            return self.local_fallback(text, self.failure_reason(e))
+
+    def request_completion(self, request: Dict[str, Any], timeout: float = None):
+        """经熔断器发送一次请求，返回 (回复内容, 是否因 max_tokens 被截断)"""
+        request_options = {} if timeout is None else {"timeout": timeout}
+        completion = self.breaker.call(
+            self.client.chat.completions.create,
+            **request_options,
+            **request
+        )
+        choice = completion.choices[0]
+        content = choice.message.content
+
+        # 输出调试信息
+        print("--------------------------------------")
+        print(f"API返回内容: {content}")
+        print("--------------------------------------")
+        return content, choice.finish_reason == "length"
+
+    @staticmethod
+    def failure_reason(error: Exception) -> str:
+        return "timeout" if isinstance(error, (APITimeoutError, httpx.TimeoutException)) else "error"
+
+    @staticmethod
+    def fallback_reason(api_response: Dict[str, Any]):
+        """解析结果不是大模型的有效回复时返回原因（timeout / error / circuit_open / parse_error），否则返回 None"""
+        return api_response.get("fallback_reason")
+
+    def local_fallback(self, text: str, reason: str = "error") -> Dict[str, Any]:
+        """
+        接口不可用（熔断、超时或调用失败）时按关键词规则本地解析
+        结果带 source 与 fallback_reason 标记，不写入缓存
+        """
+        response = self.normalize_response(rule_based_intent(text))
+        response["source"] = "local_rules"
+        response["fallback_reason"] = reason
+        return response
+
+    def call_multimodal_api(self, texts: List[str], timeout: float = None) -> Union[List[Dict[str, Any]], None]:
+        """
+        把同一时间窗内多个模态的输入合并为一次调用，按序号返回每条输入的标准化指令
+        接口熔断或调用失败时每条使用本地规则解析；返回内容缺项、被截断或无法解析时返回 None，由调用方逐条重试
+        """
+        lines = "\n".join(f"{i}. ({self.identify_input_mode(text)}) {text}" for i, text in enumerate(texts, 1))
+        try:
+            content, truncated = self.request_completion(
+                build_multimodal_request(lines, len(texts), self.compact_prompt), timeout)
+        except CircuitOpenError:
+            print("接口熔断中，使用本地规则解析")
+            return [self.local_fallback(text, "circuit_open") for text in texts]
+        except Exception as e:
+            print(f"API调用错误: {str(e)}")
+            return [self.local_fallback(text, self.failure_reason(e)) for text in texts]
+        if truncated:
+            print("融合结果被截断，逐条重试")
+            return None
+
+        try:
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0].strip()
+            data = json.loads(content)
+            items = data["results"] if isinstance(data, dict) else data
+            by_index = {int(item["index"]): item for item in items}
+            return [self.normalize_response(by_index[i]) for i in range(1, len(texts) + 1)]
+        except (json.JSONDecodeError, IndexError, KeyError, TypeError, ValueError, AttributeError) as e:
+            print(f"融合结果解析错误: {str(e)}\nAPI返回内容: {content}")
+            return None
+
     def generate_safe_instruction(self, response: Dict[str, Any]) -> Dict[str, Any]:
         print(f"🔍 generate_safe_instruction 调试:")
         print(f"   输入response: {response}")
@@ -349,12 +421,107 @@ class DrivingSystem:
         return {"默认指令": "MAINTAIN_CURRENT_STATE"}
     
 
-    def process_driving_command(self, input_text: str) -> Dict[str, Any]:
+    def lookup_response(self, input_text: str):
+        """预处理输入并查询解析缓存，返回 (预处理文本, 缓存键, 缓存结果或 None)"""
         processed = self.preprocess_driving_data(input_text)
-        api_response = self.call_deepseek_driving_api(processed)
+        cache_key = self.response_cache.make_key(self.identify_input_mode(processed), processed)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            print(f"🔍 命中解析缓存: {cached}")
+        return processed, cache_key, cached
+
+    def store_response(self, cache_key: str, api_response: Dict[str, Any]):
+        """只缓存大模型的有效解析结果（带 fallback_reason 标记的解析失败与本地兜底结果不缓存）"""
+        if "fallback_reason" not in api_response:
+            self.response_cache.put(cache_key, api_response)
+
+    def process_driving_command(self, input_text: str, timeout: float = None):
+        """返回指令结果；结果来自兜底时包装为 Fallback，由分发器单独计数"""
+        processed, cache_key, api_response = self.lookup_response(input_text)
+        reason = None
+        if api_response is None:
+            api_response = self.call_deepseek_driving_api(processed, timeout)
+            self.store_response(cache_key, api_response)
+            reason = self.fallback_reason(api_response)
         result = self.generate_safe_instruction(api_response)
         print(f"🔍 最终处理结果: {result}")
-        return result
+        return result if reason is None else Fallback(result, reason)
+
+    def process_multimodal_commands(self, events: List[tuple], timeout: float = None) -> List[tuple]:
+        """
+        处理同一时间窗内的多条需要大模型解析的事件，返回与 events 对应的 [(指令结果, 日志类型)]
+        命中缓存的直接使用；其余合并为一次调用，合并结果不完整时逐条调用
+        其中有结果来自兜底时整批包装为 Fallback（原因取第一条兜底结果的）
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = [None] * len(events)
+        misses = []
+        for i, (input_text, log_type) in enumerate(events):
+            processed, cache_key, cached = self.lookup_response(input_text)
+            if cached is not None:
+                results[i] = (self.generate_safe_instruction(cached), log_type)
+            else:
+                misses.append((i, processed, cache_key))
+
+        responses = None
+        if len(misses) > 1:
+            responses = self.call_multimodal_api([processed for _, processed, _ in misses], timeout)
+        if responses is None:
+            responses = [
+                self.call_deepseek_driving_api(
+                    processed, None if deadline is None else max(0.1, deadline - time.monotonic()))
+                for _, processed, _ in misses
+            ]
+        reasons = []
+        for (i, _, cache_key), api_response in zip(misses, responses):
+            self.store_response(cache_key, api_response)
+            reasons.append(self.fallback_reason(api_response))
+            results[i] = (self.generate_safe_instruction(api_response), events[i][1])
+        print(f"🔍 融合处理结果: {results}")
+        reason = next((r for r in reasons if r is not None), None)
+        return results if reason is None else Fallback(results, reason)
+
+    def publish_results(self, results: List[tuple]):
+        """输出一批 (指令结果, 日志类型)：日志一次批量写入，结果一次推送到前端输出队列"""
+        logs = []
+        for result, log_type in results:
+            print("指令生成结果:")
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+            if isinstance(result, dict) and "系统日志" in result:
+                logs.append((log_type, result["系统日志"]))
+        if logs:
+            print("存储 logs:", [action for _, action in logs])
+            insert_logs(self.username, self.role, logs)
+        with self.output_condition:
+            self.output_queue.extend(result for result, _ in results)
+            print("📤 加入\n")
+            self.output_condition.notify_all()
+
+    def process_event_batch(self, events: List[tuple]):
+        """
+        事件融合后的批处理入口（融合线程中调用），events 为去重后的 [(输入文本, 日志类型)]
+        封闭词表事件本地解析后立即输出；其余事件入队大模型分发器，多条时合并为一次调用
+        """
+        results, pending = [], []
+        for input_text, log_type in events:
+            local = self.intent_resolver.resolve(input_text)
+            if local is None:
+                pending.append((input_text, log_type))
+            else:
+                results.append((self.generate_safe_instruction(local), log_type))
+        if results:
+            self.publish_results(results)
+
+        if len(pending) == 1:
+            input_text, log_type = pending[0]
+            # 同一模态的普通请求由新请求取代仍在排队或执行中的旧请求（如连续两句语音只执行后一句）；紧急事件从不被取代
+            urgent = event_priority(input_text) == PRIORITY_URGENT
+            self.dispatcher.submit(input_text, lambda result: self.publish_results([(result, log_type)]),
+                                   key=None if urgent else log_type)
+        elif pending:
+            self.dispatcher.submit(pending, self.publish_results,
+                                   priority=min(event_priority(text) for text, _ in pending),
+                                   handler=self.process_multimodal_commands)
 
     def handle_transcription(self, text: str):
         """
@@ -364,57 +531,28 @@ class DrivingSystem:
         3. 输出最终指令
         """
         print("收到语音文本，正在处理...")
-        result = self.process_driving_command(f"[语音] {text}")
-        print("指令生成结果:")
-        re = json.dumps(result, ensure_ascii=False, indent=2)
-        print(re)
-        if isinstance(result, dict) and "系统日志" in result:
-            log_message = result["系统日志"]
-            print("存储 logs:", log_message)
-            insert_log(self.username, self.role,"语音", log_message)
-        with self.output_condition:
-            self.output_queue.append(result)
-            print("📤 加入\n")
-            self.output_condition.notify_all()
-
+        self.fusion.add(f"[语音] {text}", "语音")
 
     def handle_status_change(self, text: str):
         """
         回调函数
         """
         print("收到面部，正在处理...")
-        result = self.process_driving_command(f"[面部] {text}")
-        print("指令生成结果:")
-        re = json.dumps(result, ensure_ascii=False, indent=2)
-        print(re)
-        if isinstance(result, dict) and "系统日志" in result:
-            log_message = result["系统日志"]
-            print("存储 logs:", log_message)
-            insert_log(self.username, self.role,"面部", log_message)
-        with self.output_condition:
-            self.output_queue.append(result)
-            print("📤 加入\n")
-            self.output_condition.notify_all()
-    
+        self.fusion.add(f"[面部] {text}", "面部")
 
     def handle_ges_change(self, text: str):
         """
         回调函数
         """
         print("收到手势，正在处理...")
-        result = self.process_driving_command(f"[手势] {text}")
-        print("指令生成结果:")
-        re = json.dumps(result, ensure_ascii=False, indent=2)
-        print(re)
-        if isinstance(result, dict) and "系统日志" in result:
-            log_message = result["系统日志"]
-            print("存储 logs:", log_message)
-            insert_log(self.username, self.role,"手势", log_message)
-        with self.output_condition:
-            self.output_queue.append(result)
-            print("📤 加入\n")
-            self.output_condition.notify_all()
-    
+        self.fusion.add(f"[手势] {text}", "手势")
+
+    def close(self):
+        """取消未发送的请求，停止工作线程并关闭连接池"""
+        self.fusion.stop()
+        self.dispatcher.shutdown(wait=False)
+        self.http_client.close()
+        self.response_cache.close()
 
     def get_stream(self):
         def event_stream():
@@ -0,0 +1,173 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+# 子进程以 python -m reco.recognizer_worker 启动（见该模块），不经过 multiprocessing 的 spawn：
+# spawn 会在子进程中按主进程的 __main__ 重新导入 app.py；启动期间改写 sys.modules["__main__"] 又会影响其他正在运行的线程
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 子进程崩溃后的重启退避（秒）：每次连续崩溃翻倍，成功处理一帧后复位
+RESTART_BACKOFF = 0.5
+RESTART_BACKOFF_MAX = 30.0
+
+
+def _worker_env():
+    """子进程环境：保证从任意工作目录都能以 reco.xxx 导入"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_ROOT, env.get("PYTHONPATH")) if p)
+    env["PYTHONIOENCODING"] = "utf-8"
+    return env
+
+
+def _read_messages(stream, results):
+    """把子进程 stdout 上的每行 JSON 消息转入队列，子进程退出（EOF）时结束"""
+    for line in stream:
+        try:
+            results.put(tuple(json.loads(line)))
+        except ValueError:
+            print(f"[识别子进程] 无法解析的消息: {line.rstrip()}")
+
+
+class RecognizerProcess:
+    """
+    运行在独立进程中的识别器（绕开 GIL）
+    主进程把帧拷入共享内存后向子进程 stdin 写一行任务，子进程处理完回 ack；
+    process() 在等待期间把子进程发回的状态变化交给 on_event，语义与线程模式下的回调一致；
+    子进程崩溃后按退避时间重启，退避期间的帧直接跳过，不在已退出的子进程上等待
+    """
+
+    def __init__(self, kind, on_event, stop_event=None):
+        self.kind = kind
+        self.on_event = on_event
+        self.stop_event = stop_event or threading.Event()
+        self.shape = None
+        self.shm = None
+        self.frame = None
+        self.proc = None
+        self.tasks = None
+        self.results = None
+        self.restarts = 0
+        self._backoff = RESTART_BACKOFF
+        self._restart_at = 0.0
+        # 处理与关闭互斥，避免关闭时主进程仍在向已释放的共享内存写帧
+        self._lock = threading.RLock()
+
+    def _start(self, shape, dtype):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frame = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        self.shape = shape
+        self.results = queue.Queue()
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "reco.recognizer_worker", self.kind, self.shm.name,
+             ",".join(str(n) for n in shape), np.dtype(dtype).str],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=_worker_env(),
+            text=True, encoding="utf-8", bufsize=1
+        )
+        self.tasks = self.proc.stdin
+        threading.Thread(target=_read_messages, args=(self.proc.stdout, self.results),
+                         name=f"recognizer-{self.kind}-reader", daemon=True).start()
+        print(f"[识别子进程] {self.kind} 已启动，pid={self.proc.pid}")
+        return self._wait_for("ready")
+
+    def _wait_for(self, kind):
+        """等待子进程消息，期间转发状态变化事件；停止或子进程退出时返回 False"""
+        while not self.stop_event.is_set():
+            try:
+                message = self.results.get(timeout=0.5)
+            except queue.Empty:
+                if self.proc.poll() is not None:
+                    return False
+                continue
+            if message[0] == "event":
+                self.on_event(message[1])
+            elif message[0] == kind:
+                return True
+        return False
+
+    def _schedule_restart(self):
+        """释放已退出的子进程及其共享内存，并推迟下一次启动（连续崩溃时退避时间翻倍）"""
+        self._shutdown()
+        self._restart_at = time.monotonic() + self._backoff
+        print(f"[识别子进程] {self.kind} 意外退出，{self._backoff:.1f} 秒后重启")
+        self._backoff = min(self._backoff * 2, RESTART_BACKOFF_MAX)
+        self.restarts += 1
+
+    def process(self, frame):
+        with self._lock:
+            if self.stop_event.is_set():
+                return
+            if self.proc is not None and self.proc.poll() is not None:
+                self._schedule_restart()
+            if self.proc is None and time.monotonic() < self._restart_at:
+                return
+            if self.proc is None or frame.shape != self.shape:
+                self._shutdown()
+                if not self._start(frame.shape, frame.dtype):
+                    if not self.stop_event.is_set():
+                        self._schedule_restart()
+                    return
+            np.copyto(self.frame, frame)
+            try:
+                self.tasks.write("1\n")
+            except OSError:
+                self._schedule_restart()
+                return
+            if self._wait_for("ack"):
+                self._backoff = RESTART_BACKOFF
+            elif not self.stop_event.is_set():
+                self._schedule_restart()
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown()
+
+    def _shutdown(self):
+        if self.proc is not None:
+            # 关闭 stdin 即通知子进程退出
+            try:
+                self.tasks.close()
+            except OSError:
+                pass
+            try:
+                self.proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+            self.proc.stdout.close()
+            print(f"[识别子进程] {self.kind} 已退出")
+            self.proc = None
+        if self.shm is not None:
+            self.frame = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class RecognizerProcessPool:
+    """管理所有识别子进程，提供统一的关闭入口"""
+
+    def __init__(self, stop_event=None):
+        self.stop_event = stop_event
+        self.workers = {}
+        self._lock = threading.Lock()
+
+    def worker(self, kind, on_event):
+        with self._lock:
+            if kind not in self.workers:
+                self.workers[kind] = RecognizerProcess(kind, on_event, self.stop_event)
+            return self.workers[kind]
+
+    def shutdown(self):
+        with self._lock:
+            for worker in self.workers.values():
+                try:
+                    worker.shutdown()
+                except Exception as e:
+                    print(f"[识别子进程] 关闭 {worker.kind} 失败: {e}")
+            self.workers.clear()
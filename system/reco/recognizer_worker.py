@@ -0,0 +1,82 @@
+"""
+识别子进程入口（由 reco/process_pool.py 以 python -m reco.recognizer_worker 启动）：
+    python -m reco.recognizer_worker 类型 共享内存名 形状(如 480,640,3) dtype
+只依赖 numpy 与标准库，子进程不会导入 app.py，也不会重建 Flask 应用、转录服务、帧总线等主进程对象，
+识别模型只在子进程中加载一次
+与主进程之间按行通信：stdin 每行一个帧任务，stdin 关闭即退出；stdout 每行一条 JSON 消息，
+识别器自身的 print 输出改到 stderr，不会混入消息
+"""
+import json
+import os
+import sys
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def build_recognizer(kind, emit):
+    """在子进程中构建识别器，状态变化通过 emit 发回主进程"""
+    if kind == "face":
+        from reco.face.face import FaceRecognizer
+        recognizer = FaceRecognizer(on_status_change=emit)
+        return recognizer.process_frame
+    if kind == "gesture":
+        from reco.ges.ges import GestureRecognizer
+        recognizer = GestureRecognizer(on_ges_change=emit)
+        return recognizer.process
+    raise ValueError(f"未知的识别器类型: {kind}")
+
+
+def attach_shared_memory(name):
+    """
+    连接主进程创建的共享内存
+    子进程不是 multiprocessing 启动的，有自己的 resource_tracker，退出时会把仍登记的共享内存删除；
+    共享内存归主进程所有，这里取消登记
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def run_worker(kind, shm_name, shape, dtype, tasks, send):
+    """
+    子进程主循环：tasks 每产生一项就从共享内存读取帧并处理，tasks 结束即退出
+    只有状态变化事件 ("event", 文本) 和处理完成确认 ("ack",) 通过 send 返回
+    """
+    shm = attach_shared_memory(shm_name)
+    try:
+        frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        frame.flags.writeable = False
+        process = build_recognizer(kind, lambda text: send("event", text))
+        send("ready")
+        for _ in tasks:
+            try:
+                process(frame)
+            except Exception as e:
+                print(f"[识别子进程:{kind}] 处理异常: {e}")
+            send("ack")
+    finally:
+        frame = None
+        shm.close()
+
+
+def main(argv):
+    kind, shm_name, shape, dtype = argv
+    # stdout 专用于消息：复制一份作为消息通道，再把 1 号描述符指向 stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    lock = threading.Lock()
+
+    def send(*message):
+        with lock:
+            channel.write(json.dumps(message, ensure_ascii=False) + "\n")
+            channel.flush()
+
+    run_worker(kind, shm_name, tuple(int(n) for n in shape.split(",")), dtype, sys.stdin, send)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,117 @@
+import copy
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """
+    大模型解析结果缓存（值为 parse_api_response 输出的 {"intent", "params"}）
+    - 键为 输入模式 + 归一化后的 preprocess_driving_data 输出
+    - LRU 淘汰（最多 maxsize 条）+ TTL 过期（ttl 秒）
+    - 可选持久化：db_path 不为空时写入 SQLite 的 llm_cache 表（见 db.md），启动时加载未过期的记录
+    """
+
+    def __init__(self, maxsize=512, ttl=24 * 3600, db_path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (created, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.loaded = 0
+        self._conn = None
+        if db_path:
+            try:
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, mode TEXT, value TEXT, created REAL)")
+                self._conn.commit()
+                self._load()
+            except sqlite3.Error as e:
+                print(f"[响应缓存] 持久化不可用，仅使用内存缓存: {e}")
+                self._conn = None
+
+    @staticmethod
+    def make_key(mode: str, text: str) -> str:
+        return f"{mode}|{_WHITESPACE.sub(' ', text).strip()}"
+
+    def _load(self):
+        cutoff = time.time() - self.ttl
+        rows = self._conn.execute(
+            "SELECT key, value, created FROM llm_cache WHERE created > ? ORDER BY created DESC LIMIT ?",
+            (cutoff, self.maxsize)).fetchall()
+        for key, value, created in reversed(rows):
+            self._entries[key] = (created, json.loads(value))
+        self.loaded = len(rows)
+        self._conn.execute("DELETE FROM llm_cache WHERE created <= ?", (cutoff,))
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        created = time.time()
+        with self._lock:
+            self._entries[key] = (created, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.maxsize:
+                evicted.append(self._entries.popitem(last=False)[0])
+                self.evictions += 1
+            if self._conn is not None:
+                try:
+                    self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in evicted])
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, mode, value, created) VALUES (?, ?, ?, ?)",
+                        (key, key.split("|", 1)[0], json.dumps(value, ensure_ascii=False), created))
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"[响应缓存] 写入失败: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "loaded_from_db": self.loaded,
+                "persistent": self._conn is not None
+            }
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import deque
+
+
+class RecognizerStats:
+    """
+    单个识别器的运行统计：处理帧数、实际帧率、平均耗时，以及两类未处理的帧
+    - skipped_by_rate：识别器跟得上，按 target_hz 限频有意跳过的帧
+    - dropped_frames：处理耗时超过 1/target_hz 的时间片，落后期间未处理的帧
+    """
+
+    def __init__(self, name, target_hz):
+        self.name = name
+        self.target_hz = target_hz
+        self.processed = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.timestamps = deque(maxlen=30)
+        self.durations = deque(maxlen=30)
+        self.lock = threading.Lock()
+
+    def record(self, seq_gap, overran, started, finished):
+        with self.lock:
+            self.processed += 1
+            if overran:
+                self.dropped += seq_gap
+            else:
+                self.skipped += seq_gap
+            self.timestamps.append(finished)
+            self.durations.append(finished - started)
+
+    def snapshot(self):
+        with self.lock:
+            fps = 0.0
+            if len(self.timestamps) > 1:
+                span = self.timestamps[-1] - self.timestamps[0]
+                fps = (len(self.timestamps) - 1) / span if span > 0 else 0.0
+            avg_ms = sum(self.durations) / len(self.durations) * 1000 if self.durations else 0.0
+            return {
+                "target_hz": self.target_hz,
+                "achieved_fps": round(fps, 2),
+                "processed": self.processed,
+                "dropped_frames": self.dropped,
+                "skipped_by_rate": self.skipped,
+                "avg_process_ms": round(avg_ms, 2)
+            }
+
+
+class RecognizerScheduler:
+    """
+    事件驱动的识别器调度
+    - 每个识别器只在帧总线发布新帧时被唤醒（条件变量阻塞，不再固定 sleep 轮询）
+    - 每个识别器声明目标频率，两次处理之间至少间隔 1/target_hz
+    - 每次总是取最新帧：上一帧处理超出了自己的时间片时，期间未处理的旧帧计入 dropped_frames；
+      否则这些帧是限频有意跳过的，计入 skipped_by_rate
+    """
+
+    def __init__(self, frame_bus, stop_event):
+        self.frame_bus = frame_bus
+        self.stop_event = stop_event
+        self._stats = {}
+
+    def run(self, name, process, target_hz):
+        """在当前线程中运行识别循环，直到 stop_event 被设置或帧总线关闭"""
+        stats = RecognizerStats(name, target_hz)
+        self._stats[name] = stats
+        interval = 1.0 / target_hz if target_hz else 0.0
+        last_seq = 0
+        next_due = 0.0
+        overran = False
+
+        while not self.stop_event.is_set() and not self.frame_bus.closed:
+            # 未到下一个处理时间点时等待（可被停止信号立即打断）
+            delay = next_due - time.perf_counter()
+            if delay > 0 and self.stop_event.wait(delay):
+                break
+
+            with self.frame_bus.latest(last_seq, timeout=0.5) as ref:
+                if ref is None:
+                    continue
+                seq_gap = ref.seq - last_seq - 1 if last_seq else 0
+                last_seq = ref.seq
+                started = time.perf_counter()
+                process(ref.frame)
+            finished = time.perf_counter()
+            stats.record(seq_gap, overran, started, finished)
+            next_due = started + interval
+            # 本次处理超出时间片时，下一次取帧前跳过的帧都是来不及处理的
+            overran = finished > next_due
+
+    def stats(self):
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
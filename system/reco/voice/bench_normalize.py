@@ -0,0 +1,87 @@
+"""
+normalize_chinese_text 一致性校验与吞吐对比（在 system 目录下运行）：
+    python -m reco.voice.bench_normalize [长文本字数=20000]
+1. 在黄金语料（常用指令 + 随机拼接的词组/单字片段）上比对新旧实现，输出必须完全一致
+2. 在短指令和长转写文本上对比新旧实现的吞吐
+"""
+import random
+import sys
+import time
+from reco.voice.voice import normalize_chinese_text, TRADITIONAL_TO_SIMPLIFIED, WORD_MAPPINGS
+
+GOLDEN_CORPUS = [
+    "", "打開空調", "關閉音樂", "開啟導航到北京", "請把溫度調高到26度", "調低音量到30",
+    "暫停音樂", "播放音樂", "開始導航", "結束導航", "打開車燈", "關閉攝像頭", "開啟攝像頭",
+    "打開空調節溫度", "打開空調高音量", "停止播放音樂", "啟動系統設置", "關閉系統",
+    "到航去機場", "把冷氣風速調到三檔", "音量大聲一點", "打开空调", "播放音乐 GPS 導航",
+    "Hello 世界，這個系統還可以", "錯誤：連接網絡失敗", "選擇種類", "確認取消返回",
+]
+
+
+def legacy_normalize(text):
+    """原实现：每次调用重建两张表，逐个词组 str.replace，再逐字拼接（作为一致性基准）"""
+    traditional_to_simplified = dict(TRADITIONAL_TO_SIMPLIFIED)
+    word_mappings = dict(WORD_MAPPINGS)
+    result = text
+    for traditional_phrase, simplified_phrase in word_mappings.items():
+        result = result.replace(traditional_phrase, simplified_phrase)
+    final_result = ''
+    for char in result:
+        final_result += traditional_to_simplified.get(char, char)
+    return final_result
+
+
+def random_corpus(count, seed=0):
+    """由词组键、词组键的前后半段、单字键和普通字符随机拼接，覆盖词组相邻/重叠的情况"""
+    rng = random.Random(seed)
+    pieces = list(WORD_MAPPINGS) + list(TRADITIONAL_TO_SIMPLIFIED)
+    pieces += [p[:2] for p in WORD_MAPPINGS] + [p[2:] for p in WORD_MAPPINGS]
+    pieces += list("的了到去在我你他一二三 ,.0123456789abc")
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(1, 40))) for _ in range(count)]
+
+
+def long_transcript(chars, seed=1, traditional=True):
+    """traditional=True 时几乎全是繁体指令（最坏情况）；否则为以简体为主、夹杂少量繁体的转写"""
+    rng = random.Random(seed)
+    pieces = GOLDEN_CORPUS[1:] + ["，", "。", "然后", "我们", "今天天气很好"]
+    if not traditional:
+        pieces = [legacy_normalize(p) for p in pieces] * 10 + GOLDEN_CORPUS[1:]
+    parts, length = [], 0
+    while length < chars:
+        piece = rng.choice(pieces)
+        parts.append(piece)
+        length += len(piece)
+    return "".join(parts)[:chars]
+
+
+def throughput(func, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    elapsed = time.perf_counter() - start
+    return len(text) * repeat / elapsed
+
+
+def main():
+    corpus = GOLDEN_CORPUS + random_corpus(5000)
+    mismatches = [text for text in corpus if normalize_chinese_text(text) != legacy_normalize(text)]
+    print(f"黄金语料 {len(corpus)} 条，不一致 {len(mismatches)} 条")
+    for text in mismatches[:5]:
+        print(f"  输入: {text!r}\n  原实现: {legacy_normalize(text)!r}\n  新实现: {normalize_chinese_text(text)!r}")
+    if mismatches:
+        sys.exit(1)
+
+    chars = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workloads = (
+        ("短指令", "打開空調", 20000),
+        (f"长转写-简体为主({chars}字)", long_transcript(chars, traditional=False), 20),
+        (f"长转写-繁体密集({chars}字)", long_transcript(chars), 20),
+    )
+    for name, sample, repeat in workloads:
+        legacy = throughput(legacy_normalize, sample, max(1, repeat // 10))
+        compiled = throughput(normalize_chinese_text, sample, repeat)
+        print(f"{name}: 原实现 {legacy / 1e6:.2f} M字/秒，新实现 {compiled / 1e6:.2f} M字/秒（{compiled / legacy:.1f}x）")
+
+
+if __name__ == "__main__":
+    main()
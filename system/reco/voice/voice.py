@@ -1,3 +1,5 @@
+import re
+
 vehicle_status = {
     "ac": {"status": "关闭", "temperature": 24, "mode": "制冷"},
     "music": {"status": "暂停", "volume": 40, "current_song": ""},
@@ -8,89 +10,104 @@ vehicle_status = {
     "windows": {"status": "关闭"}
 }
 
+# 繁体到简体的映射 - 特别加强车载功能相关词汇
+# （单字键用于逐字转换；多字键保留原表内容，逐字转换时不会命中）
+TRADITIONAL_TO_SIMPLIFIED = {
+    # === 基础操作词汇 ===
+    '開': '开', '關': '关', '打開': '打开', '關閉': '关闭', '開啟': '开启',
+    '啟動': '启动', '停止': '停止', '暫停': '暂停', '調節': '调节', '調整': '调整',
+    '設置': '设置', '控制': '控制', '執行': '执行', '運行': '运行', '操作': '操作',
+    
+    # === 音乐/媒体相关 ===
+    '音樂': '音乐', '樂': '乐', '歌曲': '歌曲', '播放': '播放', '暫停': '暂停',
+    '音量': '音量', '聲音': '声音', '響度': '响度', '媒體': '媒体', '音響': '音响',
+    '聲': '声', '響': '响', '頻': '频', '率': '率', '調': '调', '節': '节',
+    '大聲': '大声', '小聲': '小声', '靜音': '静音', '音效': '音效', '效果': '效果',
+    
+    # === 导航相关 ===
+    '導航': '导航', '導': '导', '航': '航', '路線': '路线', '線': '线',
+    '到航': '导航',
+    '到行': '导航',
+    '地圖': '地图', '圖': '图', '前往': '前往', '到達': '到达', '達': '达',
+    '位置': '位置', '地點': '地点', '點': '点', '目標': '目标', '標': '标',
+    '路徑': '路径', '徑': '径', '方向': '方向', '導向': '导向', '指引': '指引',
+    
+    # === 空调相关 ===
+    '空調': '空调', '調': '调', '冷氣': '冷气', '氣': '气', '暖氣': '暖气',
+    '溫度': '温度', '溫': '温', '度': '度', '製冷': '制冷', '製熱': '制热',
+    '風速': '风速', '風': '风', '速': '速', '檔位': '档位', '檔': '档',
+    '涼': '凉', '熱': '热', '冷': '冷', '暖': '暖', '舒適': '舒适', '適': '适',
+    
+    
+    
+    # === 系统相关 ===
+    '系統': '系统', '統': '统', '設備': '设备', '備': '备', '裝置': '装置',
+    '裝': '装', '置': '置', '設定': '设定', '定': '定', '配置': '配置',
+    '電': '电', '腦': '脑', '網': '网', '絡': '络', '連': '连', '接': '接',
+    
+    
+    # === 时间/位置介词 ===
+    '於': '于', '為': '为', '與': '与', '從': '从', '來': '来', '還': '还',
+    '這': '这', '那': '那', '個': '个', '們': '们', '時': '时', '間': '间',
+    
+    # === 常用动词 ===
+    '應': '应', '該': '该', '會': '会', '將': '将', '請': '请', '讓': '让',
+    '給': '给', '對': '对', '說': '说', '話': '话', '聽': '听', '見': '见',
+    '看': '看', '選': '选', '擇': '择', '選擇': '选择', '確認': '确认',
+    '確': '确', '認': '认', '取消': '取消', '返回': '返回', '退出': '退出',
+    
+    # === 数量/程度 ===
+    '個': '个', '種': '种', '類': '类', '樣': '样', '種類': '种类',
+    '數量': '数量', '數': '数', '量': '量', '大小': '大小', '高低': '高低',
+    '強弱': '强弱', '強': '强', '弱': '弱', '多少': '多少', '幾': '几',
+    
+    # === 特殊词组 ===
+    '開始': '开始', '結束': '结束', '結': '结', '束': '束', '完成': '完成',
+    '成功': '成功', '失敗': '失败', '敗': '败', '錯誤': '错误', '錯': '错',
+    '誤': '误', '正確': '正确', '好的': '好的', '可以': '可以', '不行': '不行'
+}
+
+# 词组替换表（先于单字转换）
+WORD_MAPPINGS = {
+    '關閉音樂': '关闭音乐', '打開空調': '打开空调', '開啟導航': '开启导航',
+    '暫停音樂': '暂停音乐', '調節溫度': '调节温度', '調整音量': '调整音量',
+    '設置導航': '设置导航', '啟動系統': '启动系统', '關閉系統': '关闭系统',
+    '播放音樂': '播放音乐', '停止播放': '停止播放', '開始導航': '开始导航',
+    '結束導航': '结束导航', '調高音量': '调高音量', '調低音量': '调低音量',
+    '調高溫度': '调高温度', '調低溫度': '调低温度', '打開車燈': '打开车灯',
+    '關閉車燈': '关闭车灯', '開啟攝像頭': '开启摄像头', '關閉攝像頭': '关闭摄像头'
+}
+
+# 以上两张表只在导入时编译一次，之后每次调用只做一遍正则扫描：
+# - 词组按长度降序排在前面，其后是需要转换的单字组成的字符类，同一位置词组优先（与原来先逐个替换词组的结果一致）
+# - 原实现会对词组替换结果再做逐字转换，这里预先对词组的替换值做同样的转换
+# - 多字键在原实现的逐字转换中不会命中，只取单字键；映射到自身的单字不参与匹配
+_CHAR_TABLE = str.maketrans({
+    traditional: simplified
+    for traditional, simplified in TRADITIONAL_TO_SIMPLIFIED.items()
+    if len(traditional) == 1 and traditional != simplified
+})
+_REPLACEMENTS = {chr(code): simplified for code, simplified in _CHAR_TABLE.items()}
+_REPLACEMENTS.update({
+    phrase: simplified.translate(_CHAR_TABLE) for phrase, simplified in WORD_MAPPINGS.items()
+})
+_NORMALIZE_PATTERN = re.compile(
+    "|".join(re.escape(phrase) for phrase in sorted(WORD_MAPPINGS, key=len, reverse=True))
+    + "|[" + "".join(re.escape(chr(code)) for code in _CHAR_TABLE) + "]"
+)
+
+
+def _replace(match):
+    return _REPLACEMENTS[match.group()]
+
+
 def normalize_chinese_text(text):
     """
     标准化中文文本，将繁体转换为简体，统一异体字
     特别针对车载系统的音乐、导航、空调功能
     """
-    # 繁体到简体的映射 - 特别加强车载功能相关词汇
-    traditional_to_simplified = {
-        # === 基础操作词汇 ===
-        '開': '开', '關': '关', '打開': '打开', '關閉': '关闭', '開啟': '开启',
-        '啟動': '启动', '停止': '停止', '暫停': '暂停', '調節': '调节', '調整': '调整',
-        '設置': '设置', '控制': '控制', '執行': '执行', '運行': '运行', '操作': '操作',
-        
-        # === 音乐/媒体相关 ===
-        '音樂': '音乐', '樂': '乐', '歌曲': '歌曲', '播放': '播放', '暫停': '暂停',
-        '音量': '音量', '聲音': '声音', '響度': '响度', '媒體': '媒体', '音響': '音响',
-        '聲': '声', '響': '响', '頻': '频', '率': '率', '調': '调', '節': '节',
-        '大聲': '大声', '小聲': '小声', '靜音': '静音', '音效': '音效', '效果': '效果',
-        
-        # === 导航相关 ===
-        '導航': '导航', '導': '导', '航': '航', '路線': '路线', '線': '线',
-        '到航': '导航',
-        '到行': '导航',
-        '地圖': '地图', '圖': '图', '前往': '前往', '到達': '到达', '達': '达',
-        '位置': '位置', '地點': '地点', '點': '点', '目標': '目标', '標': '标',
-        '路徑': '路径', '徑': '径', '方向': '方向', '導向': '导向', '指引': '指引',
-        
-        # === 空调相关 ===
-        '空調': '空调', '調': '调', '冷氣': '冷气', '氣': '气', '暖氣': '暖气',
-        '溫度': '温度', '溫': '温', '度': '度', '製冷': '制冷', '製熱': '制热',
-        '風速': '风速', '風': '风', '速': '速', '檔位': '档位', '檔': '档',
-        '涼': '凉', '熱': '热', '冷': '冷', '暖': '暖', '舒適': '舒适', '適': '适',
-        
-        
-        
-        # === 系统相关 ===
-        '系統': '系统', '統': '统', '設備': '设备', '備': '备', '裝置': '装置',
-        '裝': '装', '置': '置', '設定': '设定', '定': '定', '配置': '配置',
-        '電': '电', '腦': '脑', '網': '网', '絡': '络', '連': '连', '接': '接',
-        
-        
-        # === 时间/位置介词 ===
-        '於': '于', '為': '为', '與': '与', '從': '从', '來': '来', '還': '还',
-        '這': '这', '那': '那', '個': '个', '們': '们', '時': '时', '間': '间',
-        
-        # === 常用动词 ===
-        '應': '应', '該': '该', '會': '会', '將': '将', '請': '请', '讓': '让',
-        '給': '给', '對': '对', '說': '说', '話': '话', '聽': '听', '見': '见',
-        '看': '看', '選': '选', '擇': '择', '選擇': '选择', '確認': '确认',
-        '確': '确', '認': '认', '取消': '取消', '返回': '返回', '退出': '退出',
-        
-        # === 数量/程度 ===
-        '個': '个', '種': '种', '類': '类', '樣': '样', '種類': '种类',
-        '數量': '数量', '數': '数', '量': '量', '大小': '大小', '高低': '高低',
-        '強弱': '强弱', '強': '强', '弱': '弱', '多少': '多少', '幾': '几',
-        
-        # === 特殊词组 ===
-        '開始': '开始', '結束': '结束', '結': '结', '束': '束', '完成': '完成',
-        '成功': '成功', '失敗': '失败', '敗': '败', '錯誤': '错误', '錯': '错',
-        '誤': '误', '正確': '正确', '好的': '好的', '可以': '可以', '不行': '不行'
-    }
-    
-    # 先进行词组替换（长词优先）
-    result = text
-    word_mappings = {
-        '關閉音樂': '关闭音乐', '打開空調': '打开空调', '開啟導航': '开启导航',
-        '暫停音樂': '暂停音乐', '調節溫度': '调节温度', '調整音量': '调整音量',
-        '設置導航': '设置导航', '啟動系統': '启动系统', '關閉系統': '关闭系统',
-        '播放音樂': '播放音乐', '停止播放': '停止播放', '開始導航': '开始导航',
-        '結束導航': '结束导航', '調高音量': '调高音量', '調低音量': '调低音量',
-        '調高溫度': '调高温度', '調低溫度': '调低温度', '打開車燈': '打开车灯',
-        '關閉車燈': '关闭车灯', '開啟攝像頭': '开启摄像头', '關閉攝像頭': '关闭摄像头'
-    }
-    
-    # 先替换词组
-    for traditional_phrase, simplified_phrase in word_mappings.items():
-        result = result.replace(traditional_phrase, simplified_phrase)
-    
-    # 再进行单字符替换
-    final_result = ''
-    for char in result:
-        final_result += traditional_to_simplified.get(char, char)
-    
-    return final_result
+    # 词组替换与单字符替换在同一遍扫描中完成
+    return _NORMALIZE_PATTERN.sub(_replace, text)
 
 def parse_voice_command(text):
     """解析语音指令并返回操作结果（支持繁简体中文）"""
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import concurrent.futures
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def decode_audio_bytes(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    在内存中解码上传的音频（webm/opus 等 ffmpeg 支持的格式）
+    通过管道把字节送入 ffmpeg，直接输出单声道 16kHz s16le，重采样也在 ffmpeg 内完成，
+    返回 whisper 可直接使用的 float32 数组（范围 [-1, 1]），全程不落盘
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "-"
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"音频解码失败: {e.stderr.decode(errors='ignore')}") from e
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def float_to_int16(samples: np.ndarray) -> np.ndarray:
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class AudioArchiver:
+    """
+    异步归档：WAV 与转写文本在后台单线程中写盘，不阻塞请求线程
+    单线程保证同一文件的追加写入顺序与提交顺序一致
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-archive")
+
+    def _write_wav(self, samples, path, sample_rate):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pcm = float_to_int16(samples) if samples.dtype != np.int16 else samples
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(pcm.tobytes())
+        print(f"[音频归档] 已保存: {path}")
+
+    def _append_text(self, path, line):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    @staticmethod
+    def _report_failure(future, path):
+        # 后台写盘失败时不会有调用方等待结果，这里打印异常避免静默丢失
+        error = future.exception()
+        if error is not None:
+            print(f"[音频归档] 写入失败: {path}，{type(error).__name__}: {error}")
+
+    def _submit(self, func, path, *args):
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda f: self._report_failure(f, path))
+        return future
+
+    def archive_wav(self, samples: np.ndarray, path: str, sample_rate: int = SAMPLE_RATE):
+        """提交 WAV 归档任务；未启用归档时直接忽略"""
+        if not self.enabled:
+            return None
+        return self._submit(self._write_wav, path, samples, path, sample_rate)
+
+    def append_text(self, path: str, line: str):
+        return self._submit(self._append_text, path, path, line)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+import concurrent.futures
+from collections import deque
+import numpy as np
+import torch
+import whisper
+from reco.whis.model_registry import registry, DEFAULT_MODEL_PATH, SAMPLE_RATE
+
+# whisper 单次解码窗口为 30 秒，超过的语音退回逐条 transcribe
+MAX_BATCH_SECONDS = 30
+# 调用方等待转录结果的默认超时（秒），避免工作线程异常退出后请求线程永久阻塞
+DEFAULT_TIMEOUT = 60.0
+
+
+class _TranscriptionRequest:
+    def __init__(self, audio):
+        self.audio = audio
+        self.future = concurrent.futures.Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchTranscriptionService:
+    """
+    批量转录服务
+    - HTTP 线程只负责把音频放入请求队列并等待结果
+    - 单个工作线程在 batch_window 时间窗内收集并发到达的语音，
+      填充成等长 (30s) 的梅尔谱后堆叠为一个 batch，一次 decode 完成
+    - 结果按请求返回，接口与 model.transcribe 一致（返回含 "text" 的字典）
+    注意：批量路径为单次贪心解码，不包含 transcribe 的温度回退
+    """
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, max_batch_size=8, batch_window=0.05, language="zh"):
+        self.model_path = model_path
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.language = language
+        self.request_queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # 统计信息
+        self._stats_lock = threading.Lock()
+        self.total_requests = 0
+        self.total_batches = 0
+        self.last_batch_size = 0
+        self.max_seen_batch_size = 0
+        self.latencies = deque(maxlen=200)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="whisper-batch", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self.request_queue.put(None)
+
+    def submit(self, audio) -> concurrent.futures.Future:
+        """提交音频（16kHz float32 数组或文件路径），返回 Future"""
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        self.start()
+        request = _TranscriptionRequest(np.asarray(audio, dtype=np.float32))
+        self.request_queue.put(request)
+        return request.future
+
+    def transcribe(self, audio, timeout=DEFAULT_TIMEOUT):
+        return self.submit(audio).result(timeout=timeout)
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.request_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # 停止信号放回队列，处理完当前批次后退出
+                self.request_queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _worker(self):
+        try:
+            while True:
+                first = self.request_queue.get()
+                if first is None:
+                    break
+                batch = self._collect_batch(first)
+                try:
+                    self._run_batch(batch)
+                except Exception as e:
+                    print(f"[批量转录] 解码异常: {e}")
+                    for request in batch:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+        finally:
+            self._fail_pending()
+
+    def _fail_pending(self):
+        """工作线程退出（停止或意外终止）时，让队列中仍在等待的请求立即失败"""
+        error = RuntimeError("批量转录工作线程已退出")
+        failed = 0
+        while True:
+            try:
+                request = self.request_queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and not request.future.done():
+                request.future.set_exception(error)
+                failed += 1
+        if failed:
+            print(f"[批量转录] 工作线程退出，{failed} 个等待中的请求已失败")
+
+    def _run_batch(self, batch):
+        model = registry.get_model(self.model_path)
+        short, long = [], []
+        for request in batch:
+            if len(request.audio) > MAX_BATCH_SECONDS * SAMPLE_RATE:
+                long.append(request)
+            else:
+                short.append(request)
+
+        with registry.inference_lock(self.model_path):
+            if short:
+                mel = torch.stack([
+                    whisper.log_mel_spectrogram(whisper.pad_or_trim(request.audio))
+                    for request in short
+                ]).to(model.device)
+                options = whisper.DecodingOptions(language=self.language, fp16=model.device.type != "cpu")
+                results = whisper.decode(model, mel, options)
+                for request, result in zip(short, results):
+                    self._finish(request, {"text": result.text, "language": result.language})
+            for request in long:
+                self._finish(request, model.transcribe(request.audio, language=self.language))
+
+        with self._stats_lock:
+            self.total_batches += 1
+            self.last_batch_size = len(batch)
+            self.max_seen_batch_size = max(self.max_seen_batch_size, len(batch))
+        print(f"[批量转录] 批大小: {len(batch)}，队列剩余: {self.request_queue.qsize()}")
+
+    def _finish(self, request, result):
+        latency = time.perf_counter() - request.enqueued_at
+        with self._stats_lock:
+            self.total_requests += 1
+            self.latencies.append(latency)
+        request.future.set_result(result)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self.latencies)
+            return {
+                "queue_depth": self.request_queue.qsize(),
+                "total_requests": self.total_requests,
+                "total_batches": self.total_batches,
+                "last_batch_size": self.last_batch_size,
+                "max_batch_size": self.max_seen_batch_size,
+                "avg_batch_size": round(self.total_requests / self.total_batches, 2) if self.total_batches else 0,
+                "avg_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0,
+                "p95_latency_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else 0
+            }
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+import numpy as np
+import whisper
+from opencc import OpenCC
+
+DEFAULT_MODEL_PATH = "./reco/whis/tiny.pt"
+SAMPLE_RATE = 16000
+
+
+class WhisperModelRegistry:
+    """
+    进程内共享的 Whisper 模型注册表
+    - 首次使用时才加载模型（懒加载），之后所有调用复用同一个实例
+    - 双重检查加锁，多个请求同时到达时只会加载一次
+    - whisper 解码时会在模型上临时挂载 kv-cache 钩子，同一模型不能被多个线程同时解码，
+      因此对外提供 inference_lock 串行化推理
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._load_lock = threading.Lock()
+        self._locks = {}
+        self._cc = None
+        self._timings = {}
+
+    def _resolve(self, model_path):
+        # 优先使用仓库中的 tiny.pt，不存在时退回官方 tiny 模型
+        if model_path and os.path.exists(model_path):
+            return model_path
+        return "tiny"
+
+    def get_model(self, model_path=DEFAULT_MODEL_PATH):
+        key = self._resolve(model_path)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._load_lock:
+            model = self._models.get(key)
+            if model is None:
+                start = time.perf_counter()
+                model = whisper.load_model(key)
+                elapsed = time.perf_counter() - start
+                # 先创建推理锁再发布模型：无锁快速路径看到模型时锁一定已存在
+                self._locks[key] = threading.Lock()
+                self._models[key] = model
+                self._timings.setdefault(key, {})["load_seconds"] = round(elapsed, 3)
+                print(f"[模型注册表] 加载 Whisper 模型: {key}，耗时 {elapsed:.2f}s")
+        return model
+
+    def inference_lock(self, model_path=DEFAULT_MODEL_PATH):
+        """返回指定模型的推理锁，调用 transcribe/decode 前应持有该锁"""
+        key = self._resolve(model_path)
+        self.get_model(model_path)
+        return self._locks[key]
+
+    def get_converter(self):
+        """繁体转简体转换器，同样只创建一次"""
+        if self._cc is None:
+            with self._load_lock:
+                if self._cc is None:
+                    self._cc = OpenCC("t2s")
+        return self._cc
+
+    def transcribe(self, audio, model_path=DEFAULT_MODEL_PATH, **kwargs):
+        """线程安全的转录接口，audio 可以是文件路径或 16kHz float32 数组"""
+        model = self.get_model(model_path)
+        with self.inference_lock(model_path):
+            return model.transcribe(audio, **kwargs)
+
+    def warm_up(self, model_path=DEFAULT_MODEL_PATH):
+        """启动时预热：加载模型并对 1 秒静音做一次解码，触发权重/算子初始化"""
+        try:
+            self.get_converter()
+            key = self._resolve(model_path)
+            dummy = np.zeros(SAMPLE_RATE, dtype=np.float32)
+            start = time.perf_counter()
+            self.transcribe(dummy, model_path, language="zh", fp16=False)
+            elapsed = time.perf_counter() - start
+            self._timings.setdefault(key, {})["warmup_seconds"] = round(elapsed, 3)
+            print(f"[模型注册表] 预热完成，耗时 {elapsed:.2f}s")
+        except Exception as e:
+            print(f"[模型注册表] 预热失败: {e}")
+
+    def stats(self):
+        """返回已加载模型及加载/预热耗时"""
+        return {
+            "loaded_models": list(self._models.keys()),
+            "timings": {key: dict(value) for key, value in self._timings.items()}
+        }
+
+
+# 全局单例
+registry = WhisperModelRegistry()
+
+
+def get_whisper_model(model_path=DEFAULT_MODEL_PATH):
+    return registry.get_model(model_path)
+
+
+def get_converter():
+    return registry.get_converter()
@@ -0,0 +1,88 @@
+import threading
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    单生产者/单消费者（SPSC）音频环形缓冲区，底层为一块预分配的 int16 数组
+    - 生产者（声卡回调）只写 _write_pos，消费者只写 _read_pos / _keep_pos，
+      各自的位置都是单调递增的绝对样本序号，读写数据不需要加锁
+    - 生产者先拷贝数据再推进 _write_pos，消费者看到新位置时数据已完整
+    - 消费者通过 release() 声明不再需要的旧数据，生产者不会覆盖 _keep_pos 之后的样本；
+      空间不足时丢弃本次写入并计入 overruns
+    - 容量取 block_size 的整数倍，按块读取时返回的始终是零拷贝视图
+    _data_ready 仅用于唤醒等待中的消费者，不保护任何数据
+    """
+
+    def __init__(self, capacity: int, channels: int = 1, block_size: int = 1024, dtype=np.int16):
+        blocks = max(2, -(-capacity // block_size))
+        self.capacity = blocks * block_size
+        self.block_size = block_size
+        self._buf = np.zeros((self.capacity, channels), dtype=dtype)
+        self._write_pos = 0
+        self._read_pos = 0
+        self._keep_pos = 0
+        self.overruns = 0
+        self._data_ready = threading.Event()
+
+    # === 生产者 ===
+    def write(self, data: np.ndarray) -> bool:
+        n = len(data)
+        write_pos = self._write_pos
+        if write_pos + n - self._keep_pos > self.capacity:
+            self.overruns += 1
+            self._data_ready.set()
+            return False
+        start = write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        self._write_pos = write_pos + n
+        self._data_ready.set()
+        return True
+
+    # === 消费者 ===
+    @property
+    def write_pos(self) -> int:
+        return self._write_pos
+
+    @property
+    def read_pos(self) -> int:
+        return self._read_pos
+
+    def available(self) -> int:
+        return self._write_pos - self._read_pos
+
+    def read(self, n: int, timeout: float = None):
+        """
+        读取 n 个样本，返回 (起始位置, 数据视图)；超时返回 (None, None)
+        视图在 release() 越过该段之前保持有效
+        """
+        while self.available() < n:
+            self._data_ready.clear()
+            if self.available() >= n:
+                break
+            if not self._data_ready.wait(timeout):
+                return None, None
+        start = self._read_pos
+        data = self.get(start, start + n)
+        self._read_pos = start + n
+        return start, data
+
+    def get(self, start: int, end: int) -> np.ndarray:
+        """按绝对位置取 [start, end) 的数据：不跨越环尾时为零拷贝视图，否则拷贝一次"""
+        s = start % self.capacity
+        e = s + (end - start)
+        if e <= self.capacity:
+            return self._buf[s:e]
+        return np.concatenate([self._buf[s:], self._buf[:e - self.capacity]], axis=0)
+
+    def release(self, pos: int):
+        """声明 pos 之前的数据不再需要，生产者可以覆盖"""
+        if pos > self._keep_pos:
+            self._keep_pos = min(pos, self._read_pos)
+
+    @property
+    def keep_pos(self) -> int:
+        return self._keep_pos
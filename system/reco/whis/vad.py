@@ -0,0 +1,192 @@
+import numpy as np
+
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """int16 PCM 转为 [-1, 1] 的 float32，多声道时只取第一声道"""
+    if samples.ndim > 1:
+        samples = samples[:, 0]
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+
+class BaseVAD:
+    """
+    语音活动检测接口
+    - is_speech(chunk): 流式判断，按到达顺序逐块调用，内部可带状态（噪声基底、拖尾）
+    - trim(samples): 对整段音频裁剪首尾静音，无状态，可在多个线程中共用
+    """
+    preroll_ms = 0
+
+    def reset(self):
+        pass
+
+    def is_speech(self, chunk: np.ndarray) -> bool:
+        raise NotImplementedError
+
+    def trim(self, samples: np.ndarray) -> np.ndarray:
+        return samples
+
+
+class RMSVAD(BaseVAD):
+    """原有的固定阈值 RMS 判断（int16 幅度），保留作对照"""
+
+    def __init__(self, threshold=150):
+        self.threshold = threshold
+
+    def is_speech(self, chunk: np.ndarray) -> bool:
+        volume = np.linalg.norm(chunk) / np.sqrt(chunk.size)
+        return volume >= self.threshold
+
+
+class SpectralVAD(BaseVAD):
+    """
+    基于能量 + 频谱特征的 VAD
+    - 以 frame_size 为帧，一次对一批帧用 NumPy 计算：能量(dB)、频谱平坦度、语音频带能量占比
+    - 判定：能量高于自适应噪声基底 margin_db，且频谱呈语音特征（不平坦或能量集中在语音频带）
+    - 噪声基底只用非语音帧更新，并在出现更安静的帧时快速下调；
+      最近 noise_window_ms 内的帧都高于基底时（风扇、发动机等背景噪声阶跃上升），
+      按最小值统计把基底上调到窗口内的最小能量，持续噪声最多在一个窗口后不再被判为语音
+    - hangover：语音结束后继续保持若干毫秒，避免字间停顿被切断
+    - preroll：供调用方在语音起点前补回的音频长度
+    - 整段裁剪时噪声基底只从首尾 edge_ms 内的帧估计，并且不超过 noise_ceiling_db，
+      避免整段都是语音时把语音能量当成噪声，切掉轻声的开头和结尾
+    流式输入写入预分配的环形缓冲区，凑满整帧后批量分析
+    """
+
+    def __init__(self, sample_rate=16000, frame_size=512, margin_db=10.0, min_energy_db=-55.0,
+                 flatness_threshold=0.45, band=(300, 3400), band_ratio_threshold=0.6,
+                 noise_adapt=0.95, preroll_ms=200, hangover_ms=300, buffer_seconds=1.0,
+                 edge_ms=300, noise_ceiling_db=-50.0, noise_window_ms=3000):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.flatness_threshold = flatness_threshold
+        self.band_ratio_threshold = band_ratio_threshold
+        self.noise_adapt = noise_adapt
+        self.preroll_ms = preroll_ms
+        self.hangover_frames = int(hangover_ms * sample_rate / 1000 / frame_size)
+        self.edge_frames = max(1, int(edge_ms * sample_rate / 1000 / frame_size))
+        self.noise_ceiling_db = noise_ceiling_db
+        # 最近 noise_window_ms 的逐帧能量（环形），填满前为 -inf，不会触发上调
+        self._recent_energy = np.empty(max(1, int(noise_window_ms * sample_rate / 1000 / frame_size)))
+
+        self.window = np.hanning(frame_size).astype(np.float32)
+        freqs = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+        self.band_mask = (freqs >= band[0]) & (freqs <= band[1])
+
+        # 环形缓冲区长度取帧长整数倍，保证每一帧在缓冲区内连续
+        n_frames = max(2, int(buffer_seconds * sample_rate / frame_size))
+        self._buf = np.zeros(n_frames * frame_size, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self._write_pos = 0
+        self._read_pos = 0
+        self.noise_floor = None
+        self._hang = 0
+        self._recent_energy.fill(-np.inf)
+        self._recent_pos = 0
+
+    # === 特征与判定（批量） ===
+    def frame_features(self, frames: np.ndarray):
+        """frames: (n, frame_size) -> 能量(dB)、频谱平坦度、语音频带能量占比"""
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        spec = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(spec), axis=1)) / np.mean(spec, axis=1)
+        band_ratio = spec[:, self.band_mask].sum(axis=1) / spec.sum(axis=1)
+        return energy_db, flatness, band_ratio
+
+    def classify(self, energy_db, flatness, band_ratio, noise_floor):
+        loud = (energy_db > noise_floor + self.margin_db) & (energy_db > self.min_energy_db)
+        voiced = (flatness < self.flatness_threshold) | (band_ratio > self.band_ratio_threshold)
+        return loud & voiced
+
+    def _update_noise_floor(self, energy_db, speech):
+        quietest = float(energy_db.min())
+        if self.noise_floor is None or quietest < self.noise_floor:
+            self.noise_floor = quietest
+        noise = energy_db[~speech]
+        if noise.size:
+            self.noise_floor = self.noise_adapt * self.noise_floor + (1 - self.noise_adapt) * float(noise.mean())
+
+        # 最小值统计：说话时字间停顿会回到噪声水平，整个窗口都高于基底只能是背景噪声变大了
+        recent = energy_db[-self._recent_energy.size:]
+        index = (self._recent_pos + np.arange(recent.size)) % self._recent_energy.size
+        self._recent_energy[index] = recent
+        self._recent_pos = int(index[-1]) + 1
+        window_min = float(self._recent_energy.min())
+        if window_min > self.noise_floor:
+            self.noise_floor = window_min
+
+    # === 流式接口 ===
+    def _write(self, samples: np.ndarray):
+        size = self._buf.size
+        if samples.size > size:
+            samples = samples[-size:]
+        start = self._write_pos % size
+        first = min(samples.size, size - start)
+        self._buf[start:start + first] = samples[:first]
+        self._buf[:samples.size - first] = samples[first:]
+        self._write_pos += samples.size
+        # 未分析的数据被覆盖时丢弃最旧的整帧
+        if self._write_pos - self._read_pos > size:
+            lag = self._write_pos - self._read_pos - size
+            self._read_pos += -(-lag // self.frame_size) * self.frame_size
+
+    def _pending_frames(self) -> np.ndarray:
+        n = (self._write_pos - self._read_pos) // self.frame_size
+        if n == 0:
+            return self._buf[:0].reshape(0, self.frame_size)
+        size = self._buf.size
+        start = self._read_pos % size
+        end = start + n * self.frame_size
+        self._read_pos += n * self.frame_size
+        if end <= size:
+            return self._buf[start:end].reshape(n, self.frame_size)
+        return np.concatenate([self._buf[start:], self._buf[:end - size]]).reshape(n, self.frame_size)
+
+    def is_speech(self, chunk: np.ndarray) -> bool:
+        self._write(to_float32(chunk))
+        frames = self._pending_frames()
+        if frames.shape[0] == 0:
+            return self._hang > 0
+
+        energy_db, flatness, band_ratio = self.frame_features(frames)
+        if self.noise_floor is None:
+            self.noise_floor = float(energy_db.min())
+        speech = self.classify(energy_db, flatness, band_ratio, self.noise_floor)
+        self._update_noise_floor(energy_db, speech)
+
+        if speech.any():
+            # 拖尾从最后一个语音帧开始计算
+            last = int(np.flatnonzero(speech)[-1])
+            self._hang = self.hangover_frames - (frames.shape[0] - 1 - last)
+            return True
+        self._hang -= frames.shape[0]
+        return self._hang > 0
+
+    # === 整段裁剪 ===
+    def trim(self, samples: np.ndarray) -> np.ndarray:
+        """
+        裁剪整段音频首尾静音（保留 preroll / hangover 余量）
+        未检测到语音时原样返回，避免误判导致整段被丢弃
+        """
+        audio = to_float32(samples)
+        n = audio.size // self.frame_size
+        if n < 2:
+            return samples
+        frames = audio[:n * self.frame_size].reshape(n, self.frame_size)
+        energy_db, flatness, band_ratio = self.frame_features(frames)
+        edges = np.concatenate([energy_db[:self.edge_frames], energy_db[-self.edge_frames:]])
+        noise_floor = min(float(np.percentile(edges, 10)), self.noise_ceiling_db)
+        speech = np.flatnonzero(self.classify(energy_db, flatness, band_ratio, noise_floor))
+        if speech.size == 0:
+            return samples
+
+        preroll = int(self.preroll_ms * self.sample_rate / 1000)
+        hangover = self.hangover_frames * self.frame_size
+        start = max(0, int(speech[0]) * self.frame_size - preroll)
+        end = min(len(samples), (int(speech[-1]) + 1) * self.frame_size + hangover)
+        return samples[start:end]
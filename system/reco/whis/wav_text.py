@@ -1,47 +1,63 @@
 import sounddevice as sd
 import numpy as np
-import queue
-import whisper
-from opencc import OpenCC
 from scipy.io.wavfile import write
-from typing import List
 from datetime import datetime
 import threading
 import os
+from reco.whis.model_registry import registry
+from reco.whis.vad import BaseVAD, SpectralVAD
+from reco.whis.ring_buffer import AudioRingBuffer
 
 class VoiceRecognizer:
-    def __init__(self,on_transcription=None):
-        self.model = whisper.load_model("./reco/whis/tiny.pt")
-        self.cc = OpenCC("t2s")
+    def __init__(self,on_transcription=None, on_partial=None, streaming=False, vad: BaseVAD = None):
+        # 模型与转换器由进程级注册表统一加载，与 Web 语音接口共享同一实例
+        self.model = registry.get_model("./reco/whis/tiny.pt")
+        self.cc = registry.get_converter()
         self.output_dir = "./reco/whis/test"
         os.makedirs(self.output_dir, exist_ok=True)
         self.SAMPLE_RATE = 16000
         self.CHANNELS = 1
         self.CHUNK_SIZE = 1024
-        self.SILENCE_THRESHOLD = 150
         self.SILENCE_DURATION = 1.5
         self.MAX_RECORD_SECONDS = 30
         self.SILENCE_CHUNK_LIMIT = int(self.SILENCE_DURATION * self.SAMPLE_RATE / self.CHUNK_SIZE)
 
-        self.audio_queue = queue.Queue()
+        # 可插拔的语音活动检测器，默认使用自适应噪声基底的频谱 VAD（旧的 RMS 阈值见 RMSVAD）
+        self.vad = vad if vad is not None else SpectralVAD(sample_rate=self.SAMPLE_RATE)
+        self.PREROLL_CHUNKS = int(np.ceil(self.vad.preroll_ms * self.SAMPLE_RATE / 1000 / self.CHUNK_SIZE))
+
+        # 预分配的 SPSC 环形缓冲区：最长录音 + 转录期间继续到达的音频
+        self.ring = AudioRingBuffer(self.SAMPLE_RATE * self.MAX_RECORD_SECONDS * 2,
+                                    channels=self.CHANNELS, block_size=self.CHUNK_SIZE)
         self.latest_transcription = ""
         self.on_transcription = on_transcription
         self.stop_event = threading.Event()
 
+        # 流式模式：录音过程中对最近 PARTIAL_WINDOW 秒的音频滑动转录，
+        # 通过 on_partial 回调输出中间结果，静音后再确认最终文本
+        self.streaming = streaming
+        self.on_partial = on_partial
+        self.PARTIAL_INTERVAL = 0.3
+        self.PARTIAL_WINDOW = 4.0
+        self.latest_partial = ""
+
     def is_silent(self, chunk: np.ndarray) -> bool:
-        volume = np.linalg.norm(chunk) / np.sqrt(chunk.size)
-        return volume < self.SILENCE_THRESHOLD
+        # 每个音频块按到达顺序只判断一次，VAD 内部维护噪声基底与拖尾状态
+        return not self.vad.is_speech(chunk)
+
+    def _next_chunk(self):
+        """从环形缓冲区读取一个块（零拷贝视图），超时返回 (None, None) 以便检查停止标志"""
+        return self.ring.read(self.CHUNK_SIZE, timeout=0.5)
 
-    def record_until_silence(self) -> np.ndarray:
-        recorded_chunks: List[np.ndarray] = []
+    def record_until_silence(self, start_pos: int) -> np.ndarray:
+        """从 start_pos 开始录音直到静音，返回整段语音（环形缓冲区中的视图或一次拷贝）"""
         silent_chunks = 0
-        total_chunks = 0
-        max_chunks = int(self.SAMPLE_RATE * self.MAX_RECORD_SECONDS / self.CHUNK_SIZE)
+        max_samples = self.SAMPLE_RATE * self.MAX_RECORD_SECONDS
 
-        while total_chunks < max_chunks:
-            chunk = self.audio_queue.get()
-            recorded_chunks.append(chunk)
-            total_chunks += 1
+        while self.ring.read_pos - start_pos < max_samples and not self.stop_event.is_set():
+            _, chunk = self._next_chunk()
+            if chunk is None:
+                continue
 
             if self.is_silent(chunk):
                 silent_chunks += 1
@@ -52,32 +68,106 @@ class VoiceRecognizer:
                 print("检测到静音，录音结束。")
                 break
 
-        return np.concatenate(recorded_chunks, axis=0)
+        return self.ring.get(start_pos, self.ring.read_pos)
+
+    def transcribe_array(self, audio: np.ndarray) -> str:
+        """直接转录 int16 音频数组（不落盘）"""
+        samples = audio.reshape(-1).astype(np.float32) / 32768.0
+        result = registry.transcribe(samples, "./reco/whis/tiny.pt", language="zh",
+                                     fp16=False, condition_on_previous_text=False)
+        return self.cc.convert(result["text"]).strip()
+
+    def record_streaming(self, start_pos: int):
+        """
+        边录音边输出中间结果
+        返回 (完整音频, 可复用的最终文本)；若最后一次中间结果已覆盖整段语音且之后只有静音，
+        则直接复用该结果，省去一次完整解码，否则返回 None 由调用方重新转录
+        """
+        silent_chunks = 0
+        max_samples = self.SAMPLE_RATE * self.MAX_RECORD_SECONDS
+        interval = int(self.PARTIAL_INTERVAL * self.SAMPLE_RATE)
+        window = int(self.PARTIAL_WINDOW * self.SAMPLE_RATE)
+
+        last_partial_pos = start_pos
+        partial_text = ""
+        partial_covers_all = False
+        self.latest_partial = ""
+
+        while self.ring.read_pos - start_pos < max_samples and not self.stop_event.is_set():
+            _, chunk = self._next_chunk()
+            if chunk is None:
+                continue
+
+            if self.is_silent(chunk):
+                silent_chunks += 1
+            else:
+                silent_chunks = 0
+                partial_covers_all = False
+
+            if silent_chunks >= self.SILENCE_CHUNK_LIMIT:
+                print("检测到静音，录音结束。")
+                break
+
+            # 解码跟不上时跳过本次中间结果，避免音频在缓冲区中堆积
+            end = self.ring.read_pos
+            if end - last_partial_pos >= interval and self.ring.available() < interval:
+                text = self.transcribe_array(self.ring.get(max(start_pos, end - window), end))
+                last_partial_pos = end
+                partial_covers_all = end - start_pos <= window
+                if text and text != partial_text:
+                    partial_text = text
+                    self.latest_partial = text
+                    if self.on_partial:
+                        self.on_partial(text)
+
+        audio_data = self.ring.get(start_pos, self.ring.read_pos)
+        final_text = partial_text if partial_covers_all and partial_text else None
+        return audio_data, final_text
 
     def audio_callback(self, indata, frames, time_info, status):
         if status:
             print(f"音频流状态警告: {status}")
-        self.audio_queue.put(indata.copy())
+        # 直接拷入预分配的环形缓冲区，回调中不再分配新数组
+        if not self.ring.write(indata):
+            print("音频缓冲区已满，丢弃一个音频块")
 
     def listen_and_transcribe(self):
         print("正在持续监听（保持静音以等待触发）...")
+        preroll_samples = self.PREROLL_CHUNKS * self.CHUNK_SIZE
 
         with sd.InputStream(samplerate=self.SAMPLE_RATE, channels=self.CHANNELS, dtype='int16',
                             blocksize=self.CHUNK_SIZE, callback=self.audio_callback):
             while not self.stop_event.is_set():
-                chunk = self.audio_queue.get()
-                if not self.is_silent(chunk):
+                chunk_pos, chunk = self._next_chunk()
+                if chunk is None:
+                    continue
+                if self.is_silent(chunk):
+                    # 只保留 preroll 长度的历史数据，其余空间交还给生产者
+                    self.ring.release(self.ring.read_pos - preroll_samples)
+                else:
                     print("检测到讲话，开始录音...")
-                    audio_data = np.concatenate([chunk, self.record_until_silence()], axis=0)
-
+                    # 从 preroll 处开始截取，避免首字被截断
+                    start_pos = max(self.ring.keep_pos, chunk_pos - preroll_samples)
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     audio_path = os.path.join(self.output_dir, f"record_{timestamp}.wav")
-                    write(audio_path, self.SAMPLE_RATE, audio_data)
-                    print(f"音频保存: {audio_path}")
 
-                    print("正在转录语音...")
-                    result = self.model.transcribe(audio_path, language="zh")
-                    text = self.cc.convert(result["text"])
+                    if self.streaming:
+                        audio_data, text = self.record_streaming(start_pos)
+                        if text is None:
+                            print("正在转录语音...")
+                            text = self.transcribe_array(audio_data)
+                        write(audio_path, self.SAMPLE_RATE, audio_data)
+                        print(f"音频保存: {audio_path}")
+                    else:
+                        audio_data = self.record_until_silence(start_pos)
+                        write(audio_path, self.SAMPLE_RATE, audio_data)
+                        print(f"音频保存: {audio_path}")
+
+                        print("正在转录语音...")
+                        result = registry.transcribe(audio_path, "./reco/whis/tiny.pt", language="zh")
+                        text = self.cc.convert(result["text"])
+                    # 本段语音已处理完，释放缓冲区空间
+                    self.ring.release(self.ring.read_pos)
                     self.latest_transcription = text
 
                     if self.on_transcription:#调用外部注册的回调函数
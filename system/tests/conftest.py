@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+import urllib.request
+import pytest
+
+# 测试在 system 目录下以 reco.xxx 导入（与 python -m reco.xxx 的运行方式一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reco.circuit_breaker import CircuitBreaker  # noqa: E402
+from reco.llm_stub import start_stub_server  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """本地大模型桩服务，返回 (server, base_url)；slow 模式只额外等待 0.5 秒"""
+    server, base_url = start_stub_server(slow_delay=0.5)
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def chat(stub):
+    """按 chat/completions 协议调用桩服务，返回解析后的 JSON 回复；HTTP 错误与超时原样抛出"""
+    _, base_url = stub
+
+    def call(text, timeout=5.0):
+        body = json.dumps({
+            "model": "qwen-plus",
+            "messages": [{"role": "user", "content": text}],
+            "response_format": {"type": "json_object"}
+        }).encode("utf-8")
+        request = urllib.request.Request(f"{base_url}/chat/completions", data=body,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            completion = json.loads(response.read())
+        return json.loads(completion["choices"][0]["message"]["content"])
+
+    return call
+
+
+@pytest.fixture
+def driving_system(stub):
+    """
+    只带大模型调用所需属性的 DrivingSystem（不加载识别模型、不连接 DashScope），请求发往桩服务
+    熔断器可在测试中替换；缺少 openai 等依赖时跳过
+    """
+    model = pytest.importorskip("reco.model")
+    from openai import OpenAI
+    _, base_url = stub
+    system = model.DrivingSystem.__new__(model.DrivingSystem)
+    system.client = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+    system.breaker = CircuitBreaker("stub")
+    system.compact_prompt = True
+    return system
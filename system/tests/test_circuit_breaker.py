@@ -0,0 +1,131 @@
+import time
+import urllib.error
+import pytest
+from reco.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture
+def transitions():
+    return []
+
+
+def make_breaker(transitions, **kwargs):
+    options = dict(window=10, min_calls=3, failure_ratio=0.5, slow_call_threshold=0.3, reset_timeout=0.2)
+    options.update(kwargs)
+    return CircuitBreaker("stub", on_transition=lambda old, new, reason: transitions.append((old, new)),
+                          **options)
+
+
+def call_n(breaker, chat, n, text="[语音] 左转"):
+    """经熔断器调用 n 次，返回每次的结果或异常类型"""
+    outcomes = []
+    for _ in range(n):
+        try:
+            outcomes.append(breaker.call(chat, text))
+        except Exception as e:
+            outcomes.append(type(e))
+    return outcomes
+
+
+def test_errors_open_then_successful_probe_closes(stub, chat, transitions):
+    server, _ = stub
+    server.script.extend(["error", "error", "error", "ok"])
+    breaker = make_breaker(transitions)
+
+    assert call_n(breaker, chat, 3) == [urllib.error.HTTPError] * 3
+    assert breaker.state == OPEN
+    # 打开期间不发送请求
+    assert call_n(breaker, chat, 2) == [CircuitOpenError] * 2
+    assert server.requests == 3
+
+    time.sleep(0.25)
+    assert breaker.state == HALF_OPEN
+    assert call_n(breaker, chat, 1) == [{"intent": "转向操作", "params": {"转向角": -30}}]
+    assert breaker.state == CLOSED
+    assert transitions == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+    stats = breaker.stats()
+    assert (stats["failures"], stats["rejected"]) == (3, 2)
+
+
+def test_failed_probe_reopens(stub, chat, transitions):
+    server, _ = stub
+    server.script.extend(["error"] * 4)
+    breaker = make_breaker(transitions)
+
+    call_n(breaker, chat, 3)
+    time.sleep(0.25)
+    assert call_n(breaker, chat, 1) == [urllib.error.HTTPError]
+    assert breaker.state == OPEN
+    assert transitions == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN)]
+
+    # 重新打开后同样要等 reset_timeout 才再次探测，此后接口恢复即关闭
+    assert call_n(breaker, chat, 1) == [CircuitOpenError]
+    time.sleep(0.25)
+    call_n(breaker, chat, 1)
+    assert breaker.state == CLOSED
+    assert server.requests == 5
+
+
+def test_slow_calls_trip_the_breaker(stub, chat, transitions):
+    server, _ = stub
+    server.slow_delay = 0.4
+    server.script.extend(["ok", "slow", "ok", "slow"])
+    breaker = make_breaker(transitions)
+
+    # 慢调用仍返回结果，但计入失败比例：3 次中 1 次未达到 0.5，4 次中 2 次时打开
+    outcomes = call_n(breaker, chat, 3)
+    assert all(isinstance(outcome, dict) for outcome in outcomes)
+    assert breaker.state == CLOSED
+    call_n(breaker, chat, 1)
+    assert breaker.state == OPEN
+    assert breaker.stats()["slow_calls"] == 2
+
+
+def test_calls_under_latency_threshold_keep_breaker_closed(stub, chat, transitions):
+    server, _ = stub
+    server.delay = 0.1
+    breaker = make_breaker(transitions)
+
+    call_n(breaker, chat, 5)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["slow_calls"] == 0
+    assert transitions == []
+
+
+def test_half_open_admits_only_probe_calls(stub, chat, transitions):
+    server, _ = stub
+    server.slow_delay = 0.2
+    server.script.extend(["error"] * 3)
+    breaker = make_breaker(transitions, slow_call_threshold=1.0)
+    call_n(breaker, chat, 3)
+    time.sleep(0.25)
+
+    # 探测请求进行中时其余请求直接拒绝
+    server.mode = "slow"
+    probe_started = []
+
+    def probe(text):
+        probe_started.append(text)
+        with pytest.raises(CircuitOpenError):
+            breaker.call(chat, text)
+        return chat(text)
+
+    assert breaker.call(probe, "[语音] 右转")["params"] == {"转向角": 30}
+    assert probe_started == ["[语音] 右转"]
+    assert breaker.state == CLOSED
+
+
+def test_driving_system_uses_local_rules_while_open(stub, driving_system):
+    server, _ = stub
+    server.script.extend(["error"] * 3)
+    system = driving_system
+    system.breaker = CircuitBreaker("stub", min_calls=3, reset_timeout=60)
+
+    for _ in range(3):
+        assert system.call_deepseek_driving_api("[语音指令] [语音] 左转")["fallback_reason"] == "error"
+    assert system.breaker.state == OPEN
+
+    response = system.call_deepseek_driving_api("[语音指令] [语音] 加速")
+    assert response == {"intent": "速度控制", "params": {"acceleration": 1.0},
+                        "source": "local_rules", "fallback_reason": "circuit_open"}
+    assert server.requests == 3
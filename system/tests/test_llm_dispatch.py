@@ -0,0 +1,142 @@
+import socket
+import threading
+import time
+import urllib.error
+import pytest
+from reco.intent_resolver import rule_based_intent
+from reco.llm_dispatch import LLMDispatcher, LLMTimeoutError, Fallback, PRIORITY_URGENT, event_priority
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def dispatchers():
+    created = []
+    yield created.append
+    for dispatcher in created:
+        dispatcher.shutdown(wait=False)
+
+
+def blocking_handler(gate):
+    """占住工作线程直到 gate 被设置，用来让后续请求在队列中排队"""
+    def handler(text, timeout):
+        gate.wait(timeout)
+        return text
+    return handler
+
+
+def stub_handler(chat, order=None):
+    """经桩服务解析；HTTP 超时时与 DrivingSystem 一样改用本地规则并包装为 Fallback"""
+    def handler(text, timeout):
+        if order is not None:
+            order.append(text)
+        try:
+            return chat(text, timeout=timeout)
+        except (socket.timeout, urllib.error.URLError) as e:
+            reason = "timeout" if isinstance(getattr(e, "reason", e), socket.timeout) else "error"
+            return Fallback(rule_based_intent(text), reason)
+    return handler
+
+
+def test_urgent_requests_jump_the_queue(chat, dispatchers):
+    order = []
+    dispatcher = LLMDispatcher(stub_handler(chat, order), workers=1)
+    dispatchers(dispatcher)
+    gate = threading.Event()
+    dispatcher.submit("block", handler=blocking_handler(gate))
+    wait_until(lambda: dispatcher.stats()["in_flight"] == 1)
+
+    texts = ["[语音] 加速到 60", "[语音] 前方路口左转", "[面部] 注意力偏离超过3秒", "[语音] 紧急刹车"]
+    futures = [dispatcher.submit(text) for text in texts]
+    assert event_priority(texts[2]) == event_priority(texts[3]) == PRIORITY_URGENT
+    gate.set()
+    results = [future.result(timeout=5) for future in futures]
+
+    # 紧急事件先发送，同优先级保持提交顺序
+    assert order == [texts[2], texts[3], texts[0], texts[1]]
+    assert results[0] == {"intent": "速度控制", "params": {"速度值": 60.0}}
+    assert results[3]["intent"] == "紧急制动"
+    assert dispatcher.stats()["completed"] == 5
+
+
+def test_newer_request_cancels_pending_one_with_same_key(chat, dispatchers):
+    published = []
+    dispatcher = LLMDispatcher(stub_handler(chat), workers=1)
+    dispatchers(dispatcher)
+    gate = threading.Event()
+    dispatcher.submit("block", handler=blocking_handler(gate))
+    wait_until(lambda: dispatcher.stats()["in_flight"] == 1)
+
+    old = dispatcher.submit("[语音] 左转", published.append, key="语音")
+    other = dispatcher.submit("[手势] 握拳", published.append, key="手势")
+    new = dispatcher.submit("[语音] 右转", published.append, key="语音")
+    assert old.cancelled()
+    gate.set()
+    assert new.result(timeout=5)["params"] == {"转向角": 30}
+    other.result(timeout=5)
+
+    stats = dispatcher.stats()
+    assert stats["superseded"] == 1
+    assert stats["cancelled"] == 0
+    assert [result["intent"] for result in published] == ["手势控制", "转向操作"]
+
+
+def test_newer_request_discards_result_of_running_one(stub, chat, dispatchers):
+    server, _ = stub
+    published = []
+    dispatcher = LLMDispatcher(stub_handler(chat), workers=2)
+    dispatchers(dispatcher)
+
+    server.mode = "slow"
+    old = dispatcher.submit("[语音] 加速到 30", published.append, key="语音")
+    wait_until(lambda: server.requests == 1)
+    server.mode = "ok"
+    new = dispatcher.submit("[语音] 加速到 50", published.append, key="语音")
+
+    assert new.result(timeout=5)["params"] == {"速度值": 50.0}
+    # 已在执行的旧请求不能取消，但完成后结果被丢弃，不会覆盖新指令
+    assert old.result(timeout=5)["params"] == {"速度值": 30.0}
+    assert published == [{"intent": "速度控制", "params": {"速度值": 50.0}}]
+    assert dispatcher.stats()["superseded"] == 1
+
+
+def test_http_timeout_counts_as_fallback_not_completed(stub, chat, dispatchers):
+    server, _ = stub
+    published = []
+    dispatcher = LLMDispatcher(stub_handler(chat), workers=1)
+    dispatchers(dispatcher)
+
+    assert dispatcher.submit("[语音] 左转").result(timeout=5)["intent"] == "转向操作"
+    server.mode = "slow"
+    future = dispatcher.submit("[语音] 紧急刹车", published.append, timeout=0.2)
+
+    # 超时后使用本地规则的结果，Future 与回调拿到的都是解包后的结果
+    assert future.result(timeout=5) == {"intent": "紧急制动", "params": {"force_level": 3}}
+    assert published == [{"intent": "紧急制动", "params": {"force_level": 3}}]
+    stats = dispatcher.stats()
+    assert stats["completed"] == 1
+    assert stats["fallback"] == 1
+    assert stats["fallback_by_reason"] == {"timeout": 1}
+    assert stats["timed_out"] == 0
+
+
+def test_request_expiring_in_queue_is_dropped(chat, dispatchers):
+    dispatcher = LLMDispatcher(stub_handler(chat), workers=1)
+    dispatchers(dispatcher)
+    gate = threading.Event()
+    dispatcher.submit("block", handler=blocking_handler(gate))
+    wait_until(lambda: dispatcher.stats()["in_flight"] == 1)
+
+    future = dispatcher.submit("[语音] 左转", timeout=0.05)
+    time.sleep(0.1)
+    gate.set()
+    with pytest.raises(LLMTimeoutError):
+        future.result(timeout=5)
+    stats = dispatcher.stats()
+    assert stats["timed_out"] == 1
+    assert stats["fallback"] == 0
@@ -0,0 +1,80 @@
+import json
+from reco.llm_dispatch import Fallback
+from reco.llm_prompt import (COMPACT_SYSTEM_PROMPT, DRIVING_RULES, LLM_COMPACT_MAX_TOKENS, build_llm_request,
+                             build_multimodal_request)
+from reco.llm_stub import stub_reply
+
+LONG_COMMAND = "[语音指令] [语音] " + "请帮我把空调温度调到二十二度并且打开座椅加热然后播放上次没听完的那张专辑" * 3
+
+
+def test_compact_prompt_lists_every_intent():
+    for intent in DRIVING_RULES:
+        assert intent in COMPACT_SYSTEM_PROMPT
+
+
+def test_compact_max_tokens_grows_with_input():
+    short = build_llm_request("[手势输入] [手势] 握拳", "手势识别")
+    long = build_llm_request(LONG_COMMAND, "语音识别")
+    assert short["max_tokens"] >= LLM_COMPACT_MAX_TOKENS
+    # 语音指令会在参数中带回原文，max_tokens 要能容纳完整的 JSON 回复
+    reply = json.dumps(stub_reply(LONG_COMMAND), ensure_ascii=False)
+    assert long["max_tokens"] > len(reply)
+
+
+def test_multimodal_request_uses_compact_mode():
+    lines = "1. (语音识别) [语音指令] [语音] 左转\n2. (手势识别) [手势输入] [手势] 握拳"
+    compact = build_multimodal_request(lines, 2)
+    other = build_multimodal_request("1. (面部识别) [面部指令] [面部] 点头确认", 1)
+    assert compact["response_format"] == {"type": "json_object"}
+    assert compact["max_tokens"] >= 2 * LLM_COMPACT_MAX_TOKENS
+    assert compact["messages"][-1]["content"] == lines
+    # 系统提示与输入无关，接口侧可以缓存这段前缀
+    assert compact["messages"][0] == other["messages"][0]
+
+
+def test_long_voice_command_is_not_truncated(stub, driving_system):
+    server, _ = stub
+    response = driving_system.call_deepseek_driving_api(LONG_COMMAND)
+    assert response == {"intent": "语音指令", "params": {"command": LONG_COMMAND}}
+    assert server.requests == 1
+
+
+def test_genuine_stop_reply_is_not_retried(stub, driving_system):
+    server, _ = stub
+    # "减速到 0" 的真实回复与解析失败的默认结果值相同，不能被当作失败
+    response = driving_system.call_deepseek_driving_api("[语音指令] [语音] 减速到 0")
+    assert response == {"intent": "速度控制", "params": {"target_speed": 0.0}}
+    assert server.requests == 1
+
+
+def test_genuine_stop_reply_is_cached(stub, driving_system):
+    from reco.response_cache import ResponseCache
+    server, _ = stub
+    driving_system.response_cache = ResponseCache(maxsize=8)
+    for _ in range(2):
+        result = driving_system.process_driving_command("[语音] 减速到 0")
+        # 真实回复不是兜底结果，不计入分发器的 fallback
+        assert not isinstance(result, Fallback)
+        assert result["参数"] == {"target_speed": 0.0}
+    assert server.requests == 1
+
+
+def test_truncated_compact_reply_retries_with_legacy_prompt(stub, driving_system, monkeypatch):
+    import reco.llm_prompt
+    monkeypatch.setattr(reco.llm_prompt, "LLM_COMPACT_MAX_TOKENS", 0)
+    server, _ = stub
+    response = driving_system.call_deepseek_driving_api(LONG_COMMAND)
+    # 桩服务对原始提示的回复会带回整段用户提示，这里只检查意图与命令文本
+    assert response["intent"] == "语音指令"
+    assert LONG_COMMAND in response["params"]["command"]
+    assert server.requests == 2
+
+
+def test_multimodal_call_parses_compact_results(stub, driving_system):
+    server, _ = stub
+    responses = driving_system.call_multimodal_api(["[语音指令] [语音] 左转", "[语音指令] [语音] 减速"])
+    assert responses == [
+        {"intent": "转向操作", "params": {"angle": -30}},
+        {"intent": "速度控制", "params": {"acceleration": -1.0}},
+    ]
+    assert server.requests == 1
@@ -0,0 +1,41 @@
+import numpy as np
+from reco.whis.vad import SpectralVAD
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+
+
+def tone(seconds, freq, level_db, rng):
+    """正弦（模拟风扇/发动机的有声背景噪声）叠加很弱的白噪声，level_db 为 dBFS 能量"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    amplitude = np.sqrt(2) * 10 ** (level_db / 20)
+    return (amplitude * np.sin(2 * np.pi * freq * t) + rng.normal(0, 1e-4, t.size)).astype(np.float32)
+
+
+def chunk_decisions(vad, audio):
+    return [vad.is_speech(audio[i:i + CHUNK]) for i in range(0, audio.size - CHUNK + 1, CHUNK)]
+
+
+def test_noise_step_stops_counting_as_speech():
+    rng = np.random.default_rng(0)
+    vad = SpectralVAD(sample_rate=SAMPLE_RATE)
+    quiet = tone(1.0, 120, -60, rng)
+    # 背景噪声突然升高 25 dB（大于 margin_db）并持续
+    hum = tone(8.0, 500, -35, rng)
+    chunk_decisions(vad, quiet)
+    decisions = chunk_decisions(vad, hum)
+
+    assert decisions[0]
+    # 一个噪声窗口（3 秒）加拖尾后不再判为语音，录音可以按静音结束
+    settled = int(4.0 * SAMPLE_RATE / CHUNK)
+    assert not any(decisions[settled:])
+    assert vad.noise_floor > -40
+
+
+def test_speech_over_raised_noise_is_still_detected():
+    rng = np.random.default_rng(1)
+    vad = SpectralVAD(sample_rate=SAMPLE_RATE)
+    chunk_decisions(vad, tone(5.0, 500, -35, rng))
+    # 噪声基底上调后，比背景高 20 dB 的语音仍能检出
+    speech = tone(0.5, 1000, -15, rng) + tone(0.5, 500, -35, rng)
+    assert any(chunk_decisions(vad, speech))